@@ -6,29 +6,408 @@ AI图片生成模块
 """
 
 import os
+import re
 import base64
+import binascii
 import time
 import json
-from typing import Optional
+import logging
+import logging.handlers
+import random
+import hashlib
+import functools
+import shutil
+import tempfile
+import threading
+import concurrent.futures
+from typing import Optional, Tuple
 from pathlib import Path
+from urllib.parse import quote_from_bytes
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+from urllib3.util.retry import Retry
 from io import BytesIO
+from json_utils import sanitize_filename, write_json
+
+try:
+    import orjson
+except ImportError:  # orjson 为可选依赖，缺失时回退到标准库 json
+    orjson = None
+
+try:
+    import ijson
+except ImportError:  # ijson 为可选依赖，缺失时整体解析 JSON 响应
+    ijson = None
+
+try:
+    from pybase64 import b64decode as _b64decode
+except ImportError:  # pybase64 为可选依赖（SIMD 加速），缺失时使用 C 实现的 binascii
+    from binascii import a2b_base64 as _b64decode
+
+logger = logging.getLogger(__name__)
+
+
+# Pollinations API endpoint
+_POLLINATIONS_BASE = "https://image.pollinations.ai/prompt/"
+
+# 规则文本中的动作关键词（忽略大小写，无需先 lower() 复制整段文本）
+# 按优先级排列：先匹配到的规则决定动作描述
+_ACTION_RULES = (
+    (re.compile(r'damage', re.IGNORECASE), "dynamic action scene"),
+    (re.compile(r'defense|prevent', re.IGNORECASE), "defensive posture"),
+)
+
+# 网络异常重试：指数退避 + 随机抖动（秒）
+_RETRY_BASE = 1.0
+_RETRY_CAP = 30.0
+_RETRY_JITTER = 1.0
+
+# 熔断：连续失败达到阈值后，在冷却期内直接跳过请求（秒）
+_BREAKER_THRESHOLD = 5
+_BREAKER_COOLDOWN = 60
+
+# 异步任务轮询：间隔从 _POLL_BASE 起按 _POLL_GROWTH 倍增长，上限为 max_interval，附加 ±20% 抖动
+_POLL_BASE = 0.5
+_POLL_GROWTH = 1.5
+_POLL_JITTER = 0.2
+
+# 批量模式中同时回写JSON的最大线程数
+_DISK_CONCURRENCY = 4
+
+# 图片缓存目录的容量上限（字节），超出后按最近使用时间淘汰最旧的文件
+_CACHE_MAX_BYTES = 1024 ** 3
+
+# 批量模式中并行读取/解析卡牌JSON的线程数
+_LOAD_CONCURRENCY = 16
+
+# 同时在途的HTTP请求上限（对应服务端的并发限制）
+_MAX_IN_FLIGHT = 8
+
+
+def _read_json(path) -> dict:
+    """读取JSON文件（优先使用 orjson 解析字节）"""
+    with open(path, 'rb') as f:
+        raw = f.read()
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw.decode('utf-8'))
+
+
+def _retry_after(response) -> Optional[float]:
+    """解析响应中以秒数表示的 Retry-After 头，缺失或无法解析时返回None"""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+
+def _not_sent(exc: requests.RequestException) -> bool:
+    """异常是否发生在请求发出之前（连接未建立），此时重发不会造成重复的计费请求"""
+    if isinstance(exc, requests.ConnectTimeout):
+        return True
+    if isinstance(exc, requests.ConnectionError) and exc.args:
+        reason = getattr(exc.args[0], 'reason', exc.args[0])
+        return isinstance(reason, NewConnectionError)
+    return False
+
+
+# base64 字母表（含换行），用 bytes.translate 删除后为空即说明全部字符合法
+_B64_ALPHABET = b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/=\n\r"
+
+
+def _looks_base64(value: str) -> bool:
+    """判断字符串是否像 base64 图像数据（较长且只包含 base64 字符），字符检查在 C 层完成"""
+    if len(value) <= 200 or not value.isascii():
+        return False
+    return not value.encode('ascii').translate(None, _B64_ALPHABET)
+
+
+# 各 API 约定存放图片数据的字段名，查找时优先于其它字段
+_B64_KEYS = frozenset({'image', 'b64_json', 'b64', 'base64', 'data', 'images', 'artifacts', 'output_images'})
+
+
+def _find_base64(obj, known: bool = False):
+    """
+    查找 JSON 中像 base64 的字符串：按文档顺序返回第一个位于图片字段下的值，没有时返回第一个像 base64 的值
+
+    与 _response_base64 流式扫描的选取规则一致。known 表示 obj 本身已位于图片字段下
+    """
+    first = None
+    stack = [(obj, known)]
+    while stack:
+        node, under = stack.pop()
+        if isinstance(node, dict):
+            stack.extend((v, under or k in _B64_KEYS) for k, v in reversed(node.items()))
+        elif isinstance(node, list):
+            stack.extend((v, under) for v in reversed(node))
+        elif isinstance(node, str) and _looks_base64(node):
+            if under:
+                return node
+            if first is None:
+                first = node
+    return first
+
+
+def _response_base64(response, keys: Optional[Tuple[str, ...]] = None) -> Optional[str]:
+    """
+    从 JSON 响应中取出第一个像 base64 的字符串
+
+    安装了 ijson 时按事件流式扫描响应体，不构建整棵 JSON 树；否则整体解析后查找。
+
+    Args:
+        response: 以 stream=True 发起的响应
+        keys: 只在这些顶层字段中查找，按给定顺序优先；None 表示查找整个文档
+    """
+    if ijson is None:
+        data = response.json()
+        if keys is None:
+            return _find_base64(data)
+        if not isinstance(data, dict):
+            return None
+        for k in keys:
+            b64 = _find_base64(data.get(k), known=k in _B64_KEYS)
+            if b64:
+                return b64
+        return None
+
+    # 位于图片字段下的值立即返回；其它值先记下第一个，扫描完仍无图片字段时再使用
+    response.raw.decode_content = True
+    found = {}
+    for prefix, event, value in ijson.parse(response.raw):
+        if event != 'string' or not _looks_base64(value):
+            continue
+        parts = prefix.split('.')
+        top = parts[0] if keys is not None else None
+        if keys is not None and top not in keys:
+            continue
+        known = not _B64_KEYS.isdisjoint(parts)
+        if top not in found or (known and not found[top][0]):
+            found[top] = (known, value)
+        if known and (keys is None or top == keys[0]):
+            break
+    for k in keys or (None,):
+        if k in found:
+            return found[k][1]
+    return None
+
+
+def _decode_base64(value) -> bytes:
+    """解码已通过 _looks_base64 检查的数据，直接走 C/SIMD 实现，极少数格式异常时回退到 base64.b64decode"""
+    try:
+        return _b64decode(value)
+    except (binascii.Error, ValueError):
+        return base64.b64decode(value)
+
+
+class _BufferedHandler(logging.handlers.MemoryHandler):
+    """
+    缓冲日志记录、批量写出的处理器：缓冲满、出现警告/错误或距上次写出超过 interval 秒时刷新
+
+    后台定时线程每 interval 秒也刷新一次，长时间没有新日志（如退避等待）时已缓冲的进度行不会一直滞留
+    """
+
+    def __init__(self, target: logging.Handler, capacity: int = 1000, interval: float = 1.0):
+        super().__init__(capacity, flushLevel=logging.WARNING, target=target)
+        self.interval = interval
+        self._last_flush = time.monotonic()
+        self._stop = threading.Event()
+        self._timer = threading.Thread(target=self._flush_periodically, name="log-flush", daemon=True)
+        self._timer.start()
+
+    def _flush_periodically(self):
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+    def shouldFlush(self, record: logging.LogRecord) -> bool:
+        return super().shouldFlush(record) or time.monotonic() - self._last_flush >= self.interval
+
+    def flush(self):
+        super().flush()
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        self._stop.set()
+        super().close()
+
+
+class _TokenBucket:
+    """令牌桶限速器：只有超出速率的请求才需要等待，允许最多 burst 个请求突发"""
+
+    def __init__(self, rate: float = 0.0, burst: int = 1):
+        """
+        Args:
+            rate: 每秒补充的令牌数，0 表示不限速
+            burst: 桶容量
+        """
+        self._lock = threading.Lock()
+        self.configure(rate, burst)
+
+    def configure(self, rate: float, burst: int = 1):
+        """重新设置速率与桶容量（桶被填满）"""
+        with self._lock:
+            self.rate = rate
+            self.burst = max(1, burst)
+            self._tokens = float(self.burst)
+            self._last = time.monotonic()
+
+    def acquire(self):
+        """取走一个令牌，令牌不足时等待到下一个令牌补充"""
+        while True:
+            with self._lock:
+                if self.rate <= 0:
+                    return
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def _has_output(path: str) -> bool:
+    """目标文件已存在且非空（用于跳过之前已生成的图片）"""
+    try:
+        return os.path.getsize(path) > 0
+    except OSError:
+        return False
+
+
+# 职业对应的画面风格
+_CLASS_STYLES = {
+    "ninja": "stealthy ninja, shadowy figure, dark atmosphere",
+    "warrior": "brave warrior, armored fighter, epic battlefield",
+    "wizard": "mystical wizard, magical energy, arcane symbols",
+    "ranger": "skilled ranger, nature background, bow and arrow",
+    "guardian": "protective guardian, shield and armor, defensive stance"
+}
+
+
+@functools.lru_cache(maxsize=4096)
+def _build_prompt(card_name: str, card_type: str, rules_text: str, class_type: str) -> str:
+    """根据卡牌字段构建提示词（纯函数，按字段元组缓存结果）"""
+    # 类型相关的风格
+    style = _CLASS_STYLES.get(class_type, "")
+
+    # 卡牌名称
+    name_part = f"themed around {card_name}" if card_name else ""
+
+    # 动作描述（从规则文本提取）
+    action = next((desc for pattern, desc in _ACTION_RULES if pattern.search(rules_text)), "")
+
+    # 拼接艺术风格，跳过空片段
+    return ", ".join(p for p in (
+        style, name_part, action,
+        "fantasy card game art", "high quality", "detailed illustration",
+    ) if p)
 
 
 class AIImageGenerator:
     """AI图片生成器类"""
 
-    def __init__(self, api_type: str = "pollinations"):
+    def __init__(self, api_type: str = "pollinations", rate_limit: int = _MAX_IN_FLIGHT):
         """
         初始化AI图片生成器
 
         Args:
             api_type: API类型 (pollinations, craiyon, etc.)
+            rate_limit: 同时在途的HTTP请求上限
         """
         self.api_type = api_type
         self.cache_dir = "generated_images_cache"
         os.makedirs(self.cache_dir, exist_ok=True)
 
+        # 所有请求复用同一个会话，连接池保持 TCP/TLS 连接，避免每张图重新握手
+        self.session = requests.Session()
+        self.session.headers.update({"User-Agent": "CardGener/1.0"})
+        # 服务端限流(429)或临时 5xx 错误时由连接池自动重试（遵循 Retry-After）
+        # 生成接口的 POST 按次计费且不幂等，不自动重发
+        retry = Retry(
+            total=3,
+            backoff_factor=0.3,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset({"GET"}),
+            raise_on_status=False,
+        )
+        # 连接池容量覆盖批量模式的全部在途请求，避免连接被丢弃后重新握手
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=16, max_retries=retry)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        # 熔断状态在并发线程间共享
+        self._breaker = {"fail": 0, "open_until": 0.0}
+        self._breaker_lock = threading.Lock()
+
+        # 并发线程共享的在途请求上限与请求速率（批量方法按 delay 设置速率）
+        self._in_flight = threading.Semaphore(max(1, rate_limit))
+        self._bucket = _TokenBucket()
+
+    def _record_result(self, ok: bool):
+        """记录请求结果，连续失败达到阈值时打开熔断"""
+        with self._breaker_lock:
+            if ok:
+                self._breaker["fail"] = 0
+                return
+            self._breaker["fail"] += 1
+            if self._breaker["fail"] >= _BREAKER_THRESHOLD:
+                self._breaker["open_until"] = time.time() + _BREAKER_COOLDOWN
+                logger.warning("⚠️ 连续 %s 次请求失败，暂停请求 %s 秒", self._breaker['fail'], _BREAKER_COOLDOWN)
+
+    def _call_with_retry(
+        self, fn, *args, max_attempts: int = 4, idempotent: bool = True, **kwargs
+    ) -> Optional[requests.Response]:
+        """
+        调用HTTP请求函数，网络异常时按指数退避重试
+
+        Args:
+            fn: 请求函数（如 self.session.get）
+            max_attempts: 最大尝试次数
+            idempotent: 为False时（生成类 POST）只在请求尚未发出的连接错误时重试
+
+        Returns:
+            响应对象；熔断打开时返回None。重试耗尽时抛出最后一次异常
+        """
+        with self._breaker_lock:
+            if time.time() < self._breaker["open_until"]:
+                logger.warning("⚠️ API 连续失败，熔断中，跳过本次请求")
+                return None
+
+        for attempt in range(max_attempts):
+            try:
+                self._bucket.acquire()
+                with self._in_flight:
+                    response = fn(*args, **kwargs)
+            except requests.RequestException as e:
+                if attempt == max_attempts - 1 or not (idempotent or _not_sent(e)):
+                    self._record_result(False)
+                    raise
+                delay = min(_RETRY_CAP, _RETRY_BASE * 2 ** attempt) + random.uniform(0, _RETRY_JITTER)
+                logger.warning("⚠️ 请求失败（第 %s 次）: %s，%.1f 秒后重试", attempt + 1, e, delay)
+                time.sleep(delay)
+                continue
+
+            # 5xx 与重试后仍为 429 的限流都算失败，其它 4xx 是请求本身的问题，不计入熔断
+            status = response.status_code
+            self._record_result(response.ok or (400 <= status < 500 and status != 429))
+            return response
+
+    def close(self):
+        """关闭HTTP会话，释放连接池"""
+        self.session.close()
+
+    def __enter__(self):
+        """上下文管理器入口"""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """上下文管理器退出"""
+        self.close()
+
     def generate_with_pollinations(self, prompt: str, width: int = 1024, height: int = 1024) -> Optional[bytes]:
         """
         使用Pollinations AI生成图片（免费）
@@ -42,29 +421,88 @@ class AIImageGenerator:
             图片字节数据或None
         """
         try:
-            # Pollinations API endpoint
-            url = f"https://image.pollinations.ai/prompt/{requests.utils.quote(prompt, safe='')}"
-            params = {
-                "width": width,
-                "height": height,
-                "nologo": "true"
-            }
+            url, params = self._pollinations_request(prompt, width, height)
 
-            print(f"🎨 生成图片: {prompt[:50]}...")
+            logger.debug("🎨 生成图片: %s...", prompt[:50])
 
-            response = requests.get(url, params=params, timeout=60)
+            response = self._call_with_retry(self.session.get, url, params=params, timeout=60)
+            if response is None:
+                return None
 
             if response.status_code == 200:
-                print(f"✅ 图片生成成功")
+                logger.debug("✅ 图片生成成功")
                 return response.content
             else:
-                print(f"❌ 生成失败: HTTP {response.status_code}")
+                logger.error("❌ 生成失败: HTTP %s", response.status_code)
                 return None
 
         except Exception as e:
-            print(f"❌ 生成图片时出错: {e}")
+            logger.error("❌ 生成图片时出错: %s", e)
             return None
 
+    def _pollinations_request(self, prompt: str, width: int, height: int):
+        """构建 Pollinations 请求的 URL 与查询参数"""
+        url = _POLLINATIONS_BASE + quote_from_bytes(prompt.encode('utf-8'), safe=b'')
+        params = {
+            "width": width,
+            "height": height,
+            "nologo": "true"
+        }
+        return url, params
+
+    def _stream_pollinations(self, prompt: str, output_path: str, width: int, height: int, cache_path: str) -> bool:
+        """
+        以流式方式下载 Pollinations 图片，分块写入磁盘，避免整张图片驻留内存
+
+        Returns:
+            是否成功
+        """
+        try:
+            url, params = self._pollinations_request(prompt, width, height)
+
+            logger.debug("🎨 生成图片: %s...", prompt[:50])
+
+            return self._stream_download(url, output_path, cache_path, params=params)
+
+        except Exception as e:
+            logger.error("❌ 生成图片时出错: %s", e)
+            return False
+
+    def _stream_download(self, url: str, output_path: str, cache_path: str, **kwargs) -> bool:
+        """
+        流式下载图片，分块写入缓存目录中的临时文件并原子替换为 cache_path，再复制到 output_path
+
+        Returns:
+            是否成功
+        """
+        tmp_path = None
+        try:
+            response = self._call_with_retry(self.session.get, url, timeout=60, stream=True, **kwargs)
+            if response is None:
+                return False
+
+            with response:
+                if response.status_code != 200:
+                    logger.error("❌ 生成失败: HTTP %s", response.status_code)
+                    return False
+
+                response.raw.decode_content = True
+                fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+                with os.fdopen(fd, 'wb') as f:
+                    shutil.copyfileobj(response.raw, f, 64 * 1024)
+
+            os.replace(tmp_path, cache_path)
+            tmp_path = None
+            logger.debug("✅ 图片生成成功")
+
+            shutil.copyfile(cache_path, output_path)
+            logger.info("✅ 图片已保存: %s", output_path)
+            return True
+
+        finally:
+            if tmp_path and os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
     def generate_with_stability(self, prompt: str, api_key: Optional[str] = None) -> Optional[bytes]:
         """
         使用Stability AI生成图片（需要API密钥）
@@ -80,7 +518,52 @@ class AIImageGenerator:
             api_key = os.environ.get("STABILITY_API_KEY")
 
         if not api_key:
-            print("⚠️ 未设置STABILITY_API_KEY环境变量")
+            logger.warning("⚠️ 未设置STABILITY_API_KEY环境变量")
+            return None
+
+        try:
+            url = "https://api.stability.ai/v1/generation/stable-diffusion-xl-1024-v1-0/text-to-image"
+
+            headers = {
+                "Authorization": f"Bearer {api_key}",
+                "Content-Type": "application/json",
+                "Accept": "application/json"
+            }
+
+            payload = {
+                "text_prompts": [{"text": prompt}],
+                "cfg_scale": 7,
+                "height": 1024,
+                "width": 1024,
+                "samples": 1,
+                "steps": 30
+            }
+
+            logger.debug("🎨 使用Stability AI生成图片...")
+
+            response = self._call_with_retry(self.session.post, url, json=payload, headers=headers, timeout=120, stream=True, idempotent=False)
+            if response is None:
+                return None
+
+            with response:
+                if response.status_code == 200:
+                    if ijson is not None:
+                        # 流式只取出第一张图片的 base64 字段
+                        response.raw.decode_content = True
+                        b64 = next(ijson.items(response.raw, 'artifacts.item.base64'), None)
+                    else:
+                        artifacts = response.json().get("artifacts")
+                        b64 = artifacts[0]["base64"] if artifacts else None
+                    if b64:
+                        image_data = _b64decode(b64)
+                        logger.debug("✅ 图片生成成功")
+                        return image_data
+
+                logger.error("❌ 生成失败: %s", response.status_code)
+                return None
+
+        except Exception as e:
+            logger.error("❌ 生成图片时出错: %s", e)
             return None
 
     def generate_with_huggingface(
@@ -100,7 +583,7 @@ class AIImageGenerator:
             api_key = os.environ.get("HF_API_KEY") or os.environ.get("HUGGINGFACE_API_KEY")
 
         if not api_key:
-            print("⚠️ 未设置 Hugging Face API key (环境变量 HF_API_KEY 或 HUGGINGFACE_API_KEY)")
+            logger.warning("⚠️ 未设置 Hugging Face API key (环境变量 HF_API_KEY 或 HUGGINGFACE_API_KEY)")
             return None
 
         url = f"https://api-inference.huggingface.co/models/{model}"
@@ -114,55 +597,38 @@ class AIImageGenerator:
         }
 
         try:
-            print(f"🎨 使用 Hugging Face ({model}) 生成图片...")
-            response = requests.post(url, headers=headers, json=payload, timeout=120)
-
-            # 如果直接返回二进制图像（Content-Type: image/*）
-            ctype = response.headers.get("content-type", "")
-            if ctype.startswith("image"):
-                print("✅ 图片生成成功 (Hugging Face)")
-                return response.content
-
-            # 否则尝试解析 JSON 中的 base64 字符串
-            try:
-                data = response.json()
-            except Exception:
-                print(f"❌ Hugging Face 返回错误: HTTP {response.status_code}")
+            logger.debug("🎨 使用 Hugging Face (%s) 生成图片...", model)
+            response = self._call_with_retry(self.session.post, url, headers=headers, json=payload, timeout=120, stream=True, idempotent=False)
+            if response is None:
                 return None
 
-            # 常见返回可能带有 base64 字符串字段
-            # 搜索第一个看起来像 base64 的值
-            def find_base64(obj):
-                if isinstance(obj, dict):
-                    for v in obj.values():
-                        res = find_base64(v)
-                        if res:
-                            return res
-                elif isinstance(obj, list):
-                    for v in obj:
-                        res = find_base64(v)
-                        if res:
-                            return res
-                elif isinstance(obj, str):
-                    # 简单判断是否为 base64（数据较长且只包含 base64 字符）
-                    if len(obj) > 200 and all(c.isalnum() or c in "+/=\n\r" for c in obj):
-                        return obj
-                return None
+            with response:
+                # 如果直接返回二进制图像（Content-Type: image/*）
+                ctype = response.headers.get("content-type", "")
+                if ctype.startswith("image"):
+                    logger.debug("✅ 图片生成成功 (Hugging Face)")
+                    return response.content
+
+                # 否则在 JSON 中搜索第一个看起来像 base64 的值
+                try:
+                    b64 = _response_base64(response)
+                except Exception:
+                    logger.error("❌ Hugging Face 返回错误: HTTP %s", response.status_code)
+                    return None
 
-            b64 = find_base64(data)
             if b64:
                 try:
-                    image_data = base64.b64decode(b64)
-                    print("✅ 图片生成成功 (Hugging Face - base64)")
+                    image_data = _decode_base64(b64)
+                    logger.debug("✅ 图片生成成功 (Hugging Face - base64)")
                     return image_data
                 except Exception:
                     pass
 
-            print(f"❌ Hugging Face 生成失败或无有效图像: HTTP {response.status_code}")
+            logger.error("❌ Hugging Face 生成失败或无有效图像: HTTP %s", response.status_code)
             return None
 
         except Exception as e:
-            print(f"❌ 使用 Hugging Face 生成时出错: {e}")
+            logger.error("❌ 使用 Hugging Face 生成时出错: %s", e)
             return None
 
     def generate_with_modelscope(
@@ -182,7 +648,7 @@ class AIImageGenerator:
             api_key = os.environ.get("MODELSCOPE_API_KEY")
 
         if not api_key:
-            print("⚠️ 未设置 MODELSCOPE_API_KEY 环境变量")
+            logger.warning("⚠️ 未设置 MODELSCOPE_API_KEY 环境变量")
             return None
 
         url = f"https://api.modelscope.cn/api/v1/models/{model}/invoke"
@@ -192,59 +658,34 @@ class AIImageGenerator:
         payload = {"input": prompt, "parameters": {"width": width, "height": height}}
 
         try:
-            print(f"🎨 使用 ModelScope ({model}) 生成图片...")
-            response = requests.post(url, headers=headers, json=payload, timeout=120)
-
-            ctype = response.headers.get("content-type", "")
-            if ctype.startswith("image"):
-                print("✅ 图片生成成功 (ModelScope)")
-                return response.content
-
-            # 尝试解析 JSON，寻找 base64 图像
-            data = response.json()
-            # 常见 ModelScope 返回可能在 outputs 或 data 字段
-            candidates = []
-            if isinstance(data, dict):
-                for k in ("outputs", "output", "data", "result"):
-                    v = data.get(k)
-                    if v:
-                        candidates.append(v)
-
-            def find_b64(obj):
-                if isinstance(obj, dict):
-                    for v in obj.values():
-                        res = find_b64(v)
-                        if res:
-                            return res
-                elif isinstance(obj, list):
-                    for v in obj:
-                        res = find_b64(v)
-                        if res:
-                            return res
-                elif isinstance(obj, str):
-                    if len(obj) > 200 and all(c.isalnum() or c in "+/=\n\r" for c in obj):
-                        return obj
+            logger.debug("🎨 使用 ModelScope (%s) 生成图片...", model)
+            response = self._call_with_retry(self.session.post, url, headers=headers, json=payload, timeout=120, stream=True, idempotent=False)
+            if response is None:
                 return None
 
-            b64 = None
-            for cand in candidates:
-                b64 = find_b64(cand)
-                if b64:
-                    break
+            with response:
+                ctype = response.headers.get("content-type", "")
+                if ctype.startswith("image"):
+                    logger.debug("✅ 图片生成成功 (ModelScope)")
+                    return response.content
+
+                # 尝试解析 JSON，寻找 base64 图像
+                # 常见 ModelScope 返回可能在 outputs 或 data 字段
+                b64 = _response_base64(response, keys=("outputs", "output", "data", "result"))
 
             if b64:
                 try:
-                    image_data = base64.b64decode(b64)
-                    print("✅ 图片生成成功 (ModelScope - base64)")
+                    image_data = _decode_base64(b64)
+                    logger.debug("✅ 图片生成成功 (ModelScope - base64)")
                     return image_data
                 except Exception:
                     pass
 
-            print(f"❌ ModelScope 返回但未找到图像: HTTP {response.status_code}")
+            logger.error("❌ ModelScope 返回但未找到图像: HTTP %s", response.status_code)
             return None
 
         except Exception as e:
-            print(f"❌ 使用 ModelScope 生成时出错: {e}")
+            logger.error("❌ 使用 ModelScope 生成时出错: %s", e)
             return None
 
     def generate_with_modelscope_inference(
@@ -255,18 +696,46 @@ class AIImageGenerator:
         width: int = 1024,
         height: int = 1024,
         poll_interval: int = 5,
+        max_interval: Optional[float] = None,
     ) -> Optional[bytes]:
         """
         使用 ModelScope 推理异步接口 (api-inference.modelscope.cn) 生成图片。
 
         示例流程参考：POST /v1/images/generations -> poll /v1/tasks/{task_id} -> 获取 data['output_images'][0]
+        轮询间隔从 0.5 秒起指数增长，上限为 max_interval（默认等于 poll_interval）；
+        服务端返回 Retry-After 时以其为准。
         返回图片字节或 None。
         """
+        try:
+            image_url = self._modelscope_inference_task(prompt, model, api_key, width, height, poll_interval, max_interval)
+            if not image_url:
+                return None
+
+            img_resp = self.session.get(image_url, timeout=60)
+            img_resp.raise_for_status()
+            logger.debug("✅ 图片生成成功 (ModelScope 推理)")
+            return img_resp.content
+
+        except Exception as e:
+            logger.error("❌ 使用 ModelScope 推理接口时出错: %s", e)
+            return None
+
+    def _modelscope_inference_task(
+        self,
+        prompt: str,
+        model: str,
+        api_key: Optional[str],
+        width: int,
+        height: int,
+        poll_interval: int,
+        max_interval: Optional[float],
+    ) -> Optional[str]:
+        """提交 ModelScope 推理异步任务并轮询到结束，返回结果图片 URL 或 None"""
         if not api_key:
             api_key = os.environ.get("MODELSCOPE_SDK_TOKEN") or os.environ.get("MODELSCOPE_API_KEY")
 
         if not api_key:
-            print("⚠️ 未设置 ModelScope SDK token (环境变量 MODELSCOPE_SDK_TOKEN 或 MODELSCOPE_API_KEY)")
+            logger.warning("⚠️ 未设置 ModelScope SDK token (环境变量 MODELSCOPE_SDK_TOKEN 或 MODELSCOPE_API_KEY)")
             return None
 
         base_url = "https://api-inference.modelscope.cn/"
@@ -283,88 +752,55 @@ class AIImageGenerator:
             "height": height,
         }
 
-        try:
-            print(f"🎨 使用 ModelScope 推理接口 ({model}) 生成图片 (异步)...")
-            resp = requests.post(
-                f"{base_url}v1/images/generations",
-                headers={**common_headers, "X-ModelScope-Async-Mode": "true"},
-                data=json.dumps(payload, ensure_ascii=False).encode('utf-8'),
+        logger.debug("🎨 使用 ModelScope 推理接口 (%s) 生成图片 (异步)...", model)
+        resp = self._call_with_retry(
+            self.session.post,
+            f"{base_url}v1/images/generations",
+            headers={**common_headers, "X-ModelScope-Async-Mode": "true"},
+            data=json.dumps(payload, ensure_ascii=False).encode('utf-8'),
+            timeout=30,
+            idempotent=False,
+        )
+        if resp is None:
+            return None
+        resp.raise_for_status()
+        task_id = resp.json().get("task_id")
+        if not task_id:
+            logger.error("❌ 未返回 task_id")
+            return None
+
+        # 轮询任务：任务刚提交时间隔短，之后逐步放宽（轮询不占用生成请求的速率配额，但复用会话的长连接）
+        if max_interval is None:
+            max_interval = poll_interval
+        attempt = 0
+        while True:
+            result = self.session.get(
+                f"{base_url}v1/tasks/{task_id}",
+                headers={**common_headers, "X-ModelScope-Task-Type": "image_generation"},
                 timeout=30,
             )
-            resp.raise_for_status()
-            task_id = resp.json().get("task_id")
-            if not task_id:
-                print("❌ 未返回 task_id")
-                return None
-
-            # 轮询任务
-            while True:
-                result = requests.get(
-                    f"{base_url}v1/tasks/{task_id}",
-                    headers={**common_headers, "X-ModelScope-Task-Type": "image_generation"},
-                    timeout=30,
-                )
-                result.raise_for_status()
-                data = result.json()
-
-                status = data.get("task_status")
-                if status == "SUCCEED":
-                    output_images = data.get("output_images") or []
-                    if not output_images:
-                        print("❌ 任务成功但未返回图片 URL")
-                        return None
-
-                    image_url = output_images[0]
-                    img_resp = requests.get(image_url, timeout=60)
-                    img_resp.raise_for_status()
-                    print("✅ 图片生成成功 (ModelScope 推理)")
-                    return img_resp.content
-
-                if status == "FAILED":
-                    print("❌ Image Generation Failed.")
+            result.raise_for_status()
+            data = result.json()
+
+            status = data.get("task_status")
+            if status == "SUCCEED":
+                output_images = data.get("output_images") or []
+                if not output_images:
+                    logger.error("❌ 任务成功但未返回图片 URL")
                     return None
 
-                time.sleep(poll_interval)
-
-        except Exception as e:
-            print(f"❌ 使用 ModelScope 推理接口时出错: {e}")
-            return None
-
-        try:
-            url = "https://api.stability.ai/v1/generation/stable-diffusion-xl-1024-v1-0/text-to-image"
-
-            headers = {
-                "Authorization": f"Bearer {api_key}",
-                "Content-Type": "application/json",
-                "Accept": "application/json"
-            }
-
-            payload = {
-                "text_prompts": [{"text": prompt}],
-                "cfg_scale": 7,
-                "height": 1024,
-                "width": 1024,
-                "samples": 1,
-                "steps": 30
-            }
+                return output_images[0]
 
-            print(f"🎨 使用Stability AI生成图片...")
-
-            response = requests.post(url, json=payload, headers=headers, timeout=120)
-
-            if response.status_code == 200:
-                data = response.json()
-                if data.get("artifacts"):
-                    image_data = base64.b64decode(data["artifacts"][0]["base64"])
-                    print(f"✅ 图片生成成功")
-                    return image_data
-
-            print(f"❌ 生成失败: {response.status_code}")
-            return None
+            if status == "FAILED":
+                logger.error("❌ Image Generation Failed.")
+                return None
 
-        except Exception as e:
-            print(f"❌ 生成图片时出错: {e}")
-            return None
+            wait = _retry_after(result)
+            if wait is None:
+                wait = min(max_interval, _POLL_BASE * _POLL_GROWTH ** attempt)
+                wait *= random.uniform(1 - _POLL_JITTER, 1 + _POLL_JITTER)
+            attempt += 1
+            time.sleep(wait)
 
     def generate_card_art_prompt(self, card_data: dict) -> str:
         """
@@ -376,43 +812,81 @@ class AIImageGenerator:
         Returns:
             图片生成提示词
         """
-        card_name = card_data.get("card_name", "")
-        card_type = card_data.get("card_type", "")
-        rules_text = card_data.get("rules_text", "")
-        class_type = card_data.get("class_type", "")
-
-        # 构建提示词
-        prompt_parts = []
-
-        # 添加类型相关的风格
-        class_styles = {
-            "ninja": "stealthy ninja, shadowy figure, dark atmosphere",
-            "warrior": "brave warrior, armored fighter, epic battlefield",
-            "wizard": "mystical wizard, magical energy, arcane symbols",
-            "ranger": "skilled ranger, nature background, bow and arrow",
-            "guardian": "protective guardian, shield and armor, defensive stance"
-        }
+        return _build_prompt(
+            card_data.get("card_name", ""),
+            card_data.get("card_type", ""),
+            card_data.get("rules_text", ""),
+            card_data.get("class_type", ""),
+        )
 
-        if class_type in class_styles:
-            prompt_parts.append(class_styles[class_type])
+    def _cache_key(self, prompt: str, width: int, height: int) -> str:
+        """根据 API 类型、模型、尺寸与提示词计算缓存键"""
+        model = getattr(self, 'api_model', None) or ""
+        return hashlib.sha256(f"{self.api_type}|{model}|{width}x{height}|{prompt}".encode('utf-8')).hexdigest()
+
+    def _cache_get(self, cache_path: str, output_path: str) -> bool:
+        """缓存命中时复制到 output_path，并刷新文件时间供淘汰时判断最近使用"""
+        if not os.path.exists(cache_path):
+            return False
+        try:
+            shutil.copyfile(cache_path, output_path)
+            os.utime(cache_path)
+        except OSError as e:
+            logger.warning("⚠️ 读取缓存失败，重新生成: %s", e)
+            return False
+        logger.info("✅ 命中缓存，图片已保存: %s", output_path)
+        return True
 
-        # 添加卡牌名称
-        if card_name:
-            prompt_parts.append(f"themed around {card_name}")
+    def prune_cache(self, max_bytes: int = _CACHE_MAX_BYTES) -> int:
+        """
+        缓存目录超过容量上限时，按最近使用时间从旧到新删除缓存图片
 
-        # 添加动作描述（从规则文本提取）
-        if "damage" in rules_text.lower():
-            prompt_parts.append("dynamic action scene")
-        elif "defense" in rules_text.lower() or "prevent" in rules_text.lower():
-            prompt_parts.append("defensive posture")
+        Returns:
+            删除的文件数
+        """
+        entries = []
+        total = 0
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if not entry.name.endswith(".png"):
+                    continue
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, entry.path))
+                total += st.st_size
 
-        # 添加艺术风格
-        prompt_parts.append("fantasy card game art")
-        prompt_parts.append("high quality")
-        prompt_parts.append("detailed illustration")
+        if total <= max_bytes:
+            return 0
 
-        prompt = ", ".join(prompt_parts)
-        return prompt
+        removed = 0
+        entries.sort()
+        for _, size, path in entries:
+            if total <= max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+
+        logger.debug("清理缓存: 删除 %d 个文件", removed)
+        return removed
+
+    def _cache_put(self, cache_path: str, image_data: bytes):
+        """原子写入缓存文件（先写临时文件再替换），失败时仅提示不影响主流程"""
+        tmp_path = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, 'wb') as f:
+                f.write(image_data)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            logger.warning("⚠️ 写入缓存失败: %s", e)
+            if tmp_path and os.path.exists(tmp_path):
+                os.unlink(tmp_path)
 
     def generate_and_save(
         self,
@@ -421,6 +895,7 @@ class AIImageGenerator:
         width: int = 1024,
         height: int = 1024,
         poll_interval: int = 5,
+        force: bool = False,
     ) -> bool:
         """
         生成并保存图片
@@ -430,14 +905,34 @@ class AIImageGenerator:
             output_path: 输出路径
             width: 宽度
             height: 高度
+            force: 为True时不读取缓存，重新请求API并用新结果覆盖缓存
 
         Returns:
             是否成功
         """
-        # 使用选择的API生成图片
+        # 相同 API/尺寸/提示词已生成过时直接复用缓存，无需再次请求
+        cache_path = os.path.join(self.cache_dir, self._cache_key(prompt, width, height) + ".png")
+        if not force and self._cache_get(cache_path, output_path):
+            return True
+
+        # Pollinations 直接返回图片流，边下载边写盘
         if self.api_type == "pollinations":
-            image_data = self.generate_with_pollinations(prompt, width, height)
-        elif self.api_type == "stability":
+            return self._stream_pollinations(prompt, output_path, width, height, cache_path)
+
+        # ModelScope 推理任务完成后返回图片 URL，同样流式下载到磁盘
+        if self.api_type == "modelscope_inference":
+            model = getattr(self, 'api_model', None) or "Qwen/Qwen-Image"
+            api_key = getattr(self, 'api_key', None)
+            poll = getattr(self, 'poll_interval', poll_interval)
+            try:
+                image_url = self._modelscope_inference_task(prompt, model, api_key, width, height, poll, None)
+                return bool(image_url) and self._stream_download(image_url, output_path, cache_path)
+            except Exception as e:
+                logger.error("❌ 使用 ModelScope 推理接口时出错: %s", e)
+                return False
+
+        # 其它API返回图片字节后再保存
+        if self.api_type == "stability":
             image_data = self.generate_with_stability(prompt)
         elif self.api_type == "huggingface":
             model = getattr(self, 'api_model', None) or "stabilityai/stable-diffusion-2"
@@ -447,32 +942,31 @@ class AIImageGenerator:
             model = getattr(self, 'api_model', None) or "damo/text-to-image"
             api_key = getattr(self, 'api_key', None)
             image_data = self.generate_with_modelscope(prompt, model=model, api_key=api_key, width=width, height=height)
-        elif self.api_type == "modelscope_inference":
-            model = getattr(self, 'api_model', None) or "Qwen/Qwen-Image"
-            api_key = getattr(self, 'api_key', None)
-            poll = getattr(self, 'poll_interval', poll_interval)
-            image_data = self.generate_with_modelscope_inference(prompt, model=model, api_key=api_key, width=width, height=height, poll_interval=poll)
         else:
-            print(f"❌ 不支持的API类型: {self.api_type}")
+            logger.error("❌ 不支持的API类型: %s", self.api_type)
             return False
 
         if image_data:
             try:
                 with open(output_path, 'wb') as f:
                     f.write(image_data)
-                print(f"✅ 图片已保存: {output_path}")
-                return True
+                logger.info("✅ 图片已保存: %s", output_path)
             except Exception as e:
-                print(f"❌ 保存图片失败: {e}")
+                logger.error("❌ 保存图片失败: %s", e)
                 return False
 
+            self._cache_put(cache_path, image_data)
+            return True
+
         return False
 
     def batch_generate_card_art(
         self,
         cards_data: list,
         output_dir: str,
-        delay: float = 2.0
+        delay: float = 2.0,
+        workers: int = 5,
+        force: bool = False,
     ) -> dict:
         """
         批量为卡牌生成艺术图片
@@ -480,38 +974,80 @@ class AIImageGenerator:
         Args:
             cards_data: 卡牌数据列表
             output_dir: 输出目录
-            delay: 请求间延迟（秒）
+            delay: 请求之间的平均间隔（秒），按令牌桶限速，0 表示不限速
+            workers: 并发请求数
+            force: 为True时即使图片已存在（包括缓存中）也重新生成
 
         Returns:
             结果字典 {card_name: image_path}
         """
-        os.makedirs(output_dir, exist_ok=True)
+        # 输出目录只在循环外创建一次
+        out_dir = Path(output_dir)
+        out_dir.mkdir(parents=True, exist_ok=True)
 
         results = {}
 
+        # 先按提示词分组：同一批次内提示词相同的卡牌只请求一次 API
+        prompt_to_cards = {}
         for idx, card_data in enumerate(cards_data):
             card_name = card_data.get("card_name", f"card_{idx}")
-            safe_name = "".join(c for c in card_name if c.isalnum() or c in (' ', '-', '_')).strip()
-            safe_name = safe_name.replace(' ', '_')
+            safe_name = sanitize_filename(card_name)
+
+            output_path = str(out_dir / f"{safe_name}.png")
 
-            output_path = os.path.join(output_dir, f"{safe_name}.png")
+            # 之前已生成过的图片直接复用，中断后重跑只处理剩余卡牌
+            if not force and _has_output(output_path):
+                logger.info("图片已存在，跳过: %s", output_path)
+                results[card_name] = output_path
+                continue
 
             # 生成提示词
             prompt = self.generate_card_art_prompt(card_data)
+            prompt_to_cards.setdefault(prompt, []).append((card_name, output_path))
+
+        total = len(prompt_to_cards)
+        if total < len(cards_data) - len(results):
+            logger.info("%d 张卡牌共 %d 个不同的提示词", len(cards_data), total)
+
+        # 只有超出 1/delay 速率的请求才会等待，其余请求立即发出
+        self._bucket.configure(1.0 / delay if delay else 0.0, burst=workers)
+
+        # 再交给线程池并发请求（网络等待可以相互重叠）
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            futures = {}
+            for idx, (prompt, cards) in enumerate(prompt_to_cards.items()):
+                card_name, output_path = cards[0]
+                logger.info("[%d/%d] 生成 %s...", idx + 1, total, card_name)
+                logger.debug("提示词: %s", prompt)
+                future = pool.submit(self.generate_and_save, prompt, output_path, force=force)
+                futures[future] = cards
+
+            for future in concurrent.futures.as_completed(futures):
+                cards = futures[future]
+                card_name, output_path = cards[0]
+                try:
+                    ok = future.result()
+                except Exception as e:
+                    logger.error("❌ 生成 %s 时出错: %s", card_name, e)
+                    ok = False
+
+                if not ok:
+                    for name, _ in cards:
+                        logger.warning("⚠️ 跳过 %s", name)
+                    continue
 
-            print(f"\n[{idx + 1}/{len(cards_data)}] 生成 {card_name}...")
-            print(f"提示词: {prompt}")
-
-            # 生成图片
-            if self.generate_and_save(prompt, output_path):
                 results[card_name] = output_path
-            else:
-                print(f"⚠️ 跳过 {card_name}")
 
-            # 延迟避免请求过快
-            if idx < len(cards_data) - 1:
-                time.sleep(delay)
+                # 复制给提示词相同的其它卡牌
+                for name, path in cards[1:]:
+                    try:
+                        if path != output_path:
+                            shutil.copyfile(output_path, path)
+                        results[name] = path
+                    except OSError as e:
+                        logger.error("❌ 复制图片到 %s 失败: %s", path, e)
 
+        self.prune_cache()
         return results
 
     def enhance_existing_cards(
@@ -523,6 +1059,9 @@ class AIImageGenerator:
         height: int = 1024,
         poll_interval: int = 5,
         skip_if_exists: bool = True,
+        delay: float = 2.0,
+        workers: int = 5,
+        force: bool = False,
     ) -> int:
         """
         为现有卡牌JSON生成图片并更新art_path
@@ -531,102 +1070,187 @@ class AIImageGenerator:
             json_dir: JSON文件目录
             output_dir: 图片输出目录
             update_json: 是否更新JSON中的art_path
+            delay: 请求之间的平均间隔（秒），按令牌桶限速，0 表示不限速
+            workers: 并发请求数
+            force: 为True时不使用图片缓存，全部重新请求API
 
         Returns:
             成功生成的数量
         """
-        json_files = list(Path(json_dir).glob("*.json"))
+        # scandir 的目录项自带类型信息，无需逐个 stat
+        try:
+            with os.scandir(json_dir) as it:
+                json_files = sorted(Path(e.path) for e in it if e.name.endswith(".json") and e.is_file())
+        except OSError:
+            json_files = []
 
         if not json_files:
-            print(f"❌ 未找到JSON文件: {json_dir}")
+            logger.error("❌ 未找到JSON文件: %s", json_dir)
             return 0
 
-        print(f"找到 {len(json_files)} 个JSON文件")
+        logger.info("找到 %d 个JSON文件", len(json_files))
 
-        os.makedirs(output_dir, exist_ok=True)
+        # 输出目录只在循环外创建一次
+        out_dir = Path(output_dir)
+        out_dir.mkdir(parents=True, exist_ok=True)
 
         success_count = 0
+        disk_sem = threading.Semaphore(_DISK_CONCURRENCY)
+        self._bucket.configure(1.0 / delay if delay else 0.0, burst=workers)
+
+        # 生产者：加载线程并行读取JSON、提取字段并构建提示词，与前面卡牌的HTTP请求重叠进行
+        # 消费者：当前线程把准备好的任务交给请求线程池（只保留提示词，不保留整棵树）
+        # 加载与请求合计最多 2 * workers 个在途任务，JSON 按需预读，不会一次全部排队
+        window = 2 * max(1, workers)
+        remaining = iter(json_files)
+        pending = {}
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, workers)) as pool, \
+                concurrent.futures.ThreadPoolExecutor(max_workers=min(_LOAD_CONCURRENCY, window)) as loader:
+
+            def prefetch():
+                while len(pending) < window:
+                    json_file = next(remaining, None)
+                    if json_file is None:
+                        return
+                    pending[loader.submit(self._prepare_card, json_file, out_dir, skip_if_exists)] = (json_file, True)
+
+            prefetch()
+            while pending:
+                done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    json_file, is_load = pending.pop(future)
+                    try:
+                        result = future.result()
+                        if not is_load:
+                            if result:
+                                success_count += 1
+                        elif result is not None:
+                            card_name, prompt, output_path = result
+                            # 只把提取出的提示词交给工作线程，不持有整棵JSON树
+                            request = pool.submit(
+                                self._enhance_one, json_file, card_name, prompt, output_path,
+                                update_json, width, height, poll_interval, disk_sem, force,
+                            )
+                            pending[request] = (json_file, False)
+                    except Exception as e:
+                        logger.error("❌ 处理失败 %s: %s", json_file, e)
+                prefetch()
+
+        self.prune_cache()
+        return success_count
 
-        for json_file in json_files:
-            try:
-                # 读取JSON
-                with open(json_file, 'r', encoding='utf-8') as f:
-                    card_json = json.load(f)
+    def _prepare_card(self, json_file: Path, out_dir: Path, skip_if_exists: bool) -> Optional[Tuple[str, str, str]]:
+        """
+        读取卡牌JSON并准备生成任务
 
-                # 提取卡牌数据
-                card_data = self.extract_card_data_from_json(card_json)
+        Returns:
+            (卡牌名, 提示词, 输出路径)；图片已存在而跳过时返回None
+        """
+        card_data = self.extract_card_data_from_json(_read_json(json_file))
 
-                # 生成图片
-                card_name = card_data.get("card_name", json_file.stem)
-                safe_name = "".join(c for c in card_name if c.isalnum() or c in (' ', '-', '_')).strip()
-                safe_name = safe_name.replace(' ', '_')
+        card_name = card_data.get("card_name", json_file.stem)
+        output_path = str(out_dir / f"{sanitize_filename(card_name)}.png")
 
-                output_path = os.path.join(output_dir, f"{safe_name}.png")
+        # 只按本卡牌的目标图片路径判断，JSON 中 Art 已指向的其它图片不影响是否重新生成
+        if skip_if_exists and _has_output(output_path):
+            logger.info("图片已存在，跳过: %s", output_path)
+            # 不更新 JSON，也不计入成功数
+            return None
 
-                prompt = self.generate_card_art_prompt(card_data)
+        return card_name, self.generate_card_art_prompt(card_data), output_path
 
-                print(f"\n生成 {card_name}...")
+    def _enhance_one(
+        self,
+        json_file: Path,
+        card_name: str,
+        prompt: str,
+        output_path: str,
+        update_json: bool,
+        width: int,
+        height: int,
+        poll_interval: int,
+        disk_sem: threading.Semaphore,
+        force: bool = False,
+    ) -> bool:
+        """
+        在工作线程中生成单张卡牌图片，并立即回写JSON
 
-                # 如果目标图片已存在且用户选择跳过，则直接跳过该卡牌
-                if skip_if_exists and os.path.exists(output_path):
-                    print(f"⚠️ 图片已存在，跳过: {output_path}")
-                    # 不更新 JSON，也不计入成功数
-                    continue
+        JSON回写与其它线程中尚未完成的网络请求重叠进行；disk_sem 限制同时读写盘的线程数。
+        仅在需要更新 art_path 时才重新读取完整JSON，排队中的任务不会占用整棵JSON树的内存。
 
-                if self.generate_and_save(prompt, output_path, width=width, height=height, poll_interval=poll_interval):
-                    success_count += 1
+        Returns:
+            图片是否生成成功
+        """
+        logger.info("生成 %s...", card_name)
+        if not self.generate_and_save(
+            prompt, output_path, width=width, height=height, poll_interval=poll_interval, force=force
+        ):
+            return False
 
-                    # 更新JSON中的art_path
-                    if update_json:
-                        self.update_json_art_path(card_json, output_path)
-                        with open(json_file, 'w', encoding='utf-8') as f:
-                            json.dump(card_json, f, indent=4, ensure_ascii=False)
-                        print(f"✅ 已更新JSON: {json_file}")
+        # 更新JSON中的art_path（src 未变化时不重写文件）
+        if update_json:
+            with disk_sem:
+                card_json = _read_json(json_file)
+                changed = self.update_json_art_path(card_json, output_path)
+                if changed:
+                    write_json(json_file, card_json)
+            if changed:
+                logger.info("✅ 已更新JSON: %s", json_file)
 
-                time.sleep(2.0)  # 延迟
+        return True
 
-            except Exception as e:
-                print(f"❌ 处理失败 {json_file}: {e}")
+    def _walk(self, data: dict, text_targets: set, art_update: Optional[str] = None) -> Tuple[dict, bool]:
+        """
+        单次迭代遍历CardConjurer JSON树
 
-        return success_count
+        Args:
+            data: JSON中的data节点
+            text_targets: 需要收集文本的text字段名称集合
+            art_update: 不为None时，将第一个Art图片节点的src更新为该值
+
+        Returns:
+            ({字段名称: 文本} 字典, Art的src是否被修改)。字典中的 'Art' 为第一个Art图片节点原有的src
+        """
+        out = {}
+        changed = False
+        stack = [data]
+        while stack:
+            node = stack.pop()
+            if not isinstance(node, dict):
+                continue
+            node_type = node.get('type')
+            name = node.get('name')
+            if node_type == 'text' and name in text_targets and not out.get(name):
+                out[name] = node.get('text', '')
+            elif node_type == 'image' and name == 'Art' and 'Art' not in out:
+                out['Art'] = node.get('src', '')
+                if art_update is not None and out['Art'] != art_update:
+                    node['src'] = art_update
+                    changed = True
+            children = node.get('children')
+            if children:
+                # 逆序压栈，保持与递归相同的文档顺序
+                stack.extend(reversed(children))
+        return out, changed
 
     def extract_card_data_from_json(self, card_json: dict) -> dict:
         """从CardConjurer JSON提取卡牌数据"""
-        card_data = {}
+        fields, _ = self._walk(card_json.get('data', {}), {'Title', 'Type', 'Rules'})
 
-        def find_text_field(data, field_name):
-            if isinstance(data, dict):
-                if data.get('type') == 'text' and data.get('name') == field_name:
-                    return data.get('text', '')
-                if 'children' in data:
-                    for child in data['children']:
-                        result = find_text_field(child, field_name)
-                        if result:
-                            return result
-            return ''
-
-        data = card_json.get('data', {})
-        card_data['card_name'] = find_text_field(data, 'Title')
-        card_data['card_type'] = find_text_field(data, 'Type')
-        card_data['rules_text'] = find_text_field(data, 'Rules')
+        card_data = {}
+        card_data['card_name'] = fields.get('Title', '')
+        card_data['card_type'] = fields.get('Type', '')
+        card_data['rules_text'] = fields.get('Rules', '')
+        card_data['art_path'] = fields.get('Art', '')
         card_data['class_type'] = 'ninja'  # 默认值
 
         return card_data
 
-    def update_json_art_path(self, card_json: dict, art_path: str):
-        """更新JSON中的art_path"""
-        def update_image_field(data, art_path):
-            if isinstance(data, dict):
-                if data.get('type') == 'image' and data.get('name') == 'Art':
-                    data['src'] = art_path
-                    return True
-                if 'children' in data:
-                    for child in data['children']:
-                        if update_image_field(child, art_path):
-                            return True
-            return False
-
-        update_image_field(card_json.get('data', {}), art_path)
+    def update_json_art_path(self, card_json: dict, art_path: str) -> bool:
+        """更新JSON中的art_path，返回是否有改动"""
+        _, changed = self._walk(card_json.get('data', {}), set(), art_update=art_path)
+        return changed
 
 
 def main():
@@ -641,13 +1265,22 @@ def main():
     parser.add_argument('--api', default='pollinations', choices=['pollinations', 'stability', 'huggingface', 'modelscope', 'modelscope_inference'], help='API类型')
     parser.add_argument('--width', type=int, default=1024, help='图片宽度')
     parser.add_argument('--height', type=int, default=1024, help='图片高度')
-    parser.add_argument('--poll-interval', type=int, default=5, help='ModelScope 推理轮询间隔（秒）')
+    parser.add_argument('--poll-interval', type=int, default=5, help='ModelScope 推理最大轮询间隔（秒）')
+    parser.add_argument('--workers', type=int, default=5, help='批量模式并发请求数（默认: 5）')
+    parser.add_argument('--force', action='store_true', help='批量模式下重新生成已存在的图片')
 
     parser.add_argument('--api-key', type=str, default=None, help='API 密钥 (Hugging Face: HF_API_KEY, ModelScope: MODELSCOPE_API_KEY)')
     parser.add_argument('--model', type=str, default=None, help='指定模型（Hugging Face 或 ModelScope 的模型标识）')
 
     args = parser.parse_args()
 
+    # 默认只输出每张卡牌的摘要，设置 LOGLEVEL=DEBUG 可查看提示词等详细信息
+    # 批量模式每张卡牌输出多行日志，经缓冲后批量写出，避免逐行刷新控制台拖慢工作线程
+    console = logging.StreamHandler()
+    console.setFormatter(logging.Formatter("%(message)s"))
+    log_buffer = _BufferedHandler(console)
+    logging.basicConfig(level=os.environ.get("LOGLEVEL", "INFO").upper(), handlers=[log_buffer])
+
     generator = AIImageGenerator(api_type=args.api)
 
     # 将可选的 api_key / model 传入 generator，方法会读取这些属性
@@ -665,7 +1298,11 @@ def main():
             width=args.width,
             height=args.height,
             poll_interval=args.poll_interval,
+            skip_if_exists=not args.force,
+            workers=args.workers,
+            force=args.force,
         )
+        log_buffer.flush()
         print(f"\n🎉 成功生成 {count} 张图片")
     elif args.prompt:
         # 单张模式
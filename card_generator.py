@@ -7,9 +7,30 @@ CardConjurer卡牌批量生成器
 
 import json
 import os
+import pickle
+import concurrent.futures
 from pathlib import Path
 import pandas as pd
-from typing import Dict, Any
+from typing import Dict, Any, Tuple
+from json_utils import sanitize_filename, write_json
+
+try:
+    import orjson
+except ImportError:  # orjson 为可选依赖，缺失时回退到 pickle / 标准库 json
+    orjson = None
+
+# 模板文本字段名 -> Excel 列名
+_TEXT_COLUMNS = (
+    ('Title', 'card_name'),
+    ('Type', 'card_type'),
+    ('Rules', 'rules_text'),
+    ('Cost', 'cost'),
+    ('Left Stat', 'power'),
+    ('Right Stat', 'defense'),
+)
+
+# 字段索引中职业框架节点的键（名称中包含 'Class' 的第一个图片节点）
+_CLASS_FRAME = ('class', '')
 
 
 class CardGenerator:
@@ -25,6 +46,73 @@ class CardGenerator:
         with open(template_path, 'r', encoding='utf-8') as f:
             self.template = json.load(f)
 
+        # 模板只序列化一次，每张卡牌从字节反序列化出独立副本，避免每次 JSON 往返深拷贝
+        if orjson is not None:
+            self._template_bytes = orjson.dumps(self.template)
+        else:
+            self._template_bytes = pickle.dumps(self.template, pickle.HIGHEST_PROTOCOL)
+
+        # 预先记录每个字段在模板中的位置，生成卡牌时直接定位，无需每个字段遍历一次整棵树
+        self._field_index = self._index_fields(self.template['data'])
+        # 生成卡牌要修改的字段路径只解析一次，模板中缺失的字段直接略过
+        self._text_paths = tuple(
+            (column, self._field_index[('text', field_name)])
+            for field_name, column in _TEXT_COLUMNS
+            if ('text', field_name) in self._field_index
+        )
+        self._collector_path = self._field_index.get(('text', 'Collector Info'))
+        self._art_path = self._field_index.get(('image', 'Art'))
+        self._class_path = self._field_index.get(_CLASS_FRAME)
+
+    @staticmethod
+    def _index_fields(root: Dict[str, Any]) -> Dict[Tuple[str, str], Tuple[int, ...]]:
+        """
+        单次遍历模板，记录每个 (type, name) 文本/图片字段第一次出现的位置
+
+        Returns:
+            {(type, name): children 下标路径}，按文档顺序取第一个匹配，与 update_* 方法一致
+        """
+        index = {}
+        stack = [(root, ())]
+        while stack:
+            node, path = stack.pop()
+            node_type = node.get('type')
+            if node_type in ('text', 'image'):
+                name = node.get('name', '')
+                index.setdefault((node_type, name), path)
+                if node_type == 'image' and 'Class' in name:
+                    index.setdefault(_CLASS_FRAME, path)
+            children = node.get('children')
+            if children:
+                for i in range(len(children) - 1, -1, -1):
+                    stack.append((children[i], path + (i,)))
+        return index
+
+    @staticmethod
+    def _node_at(root: Dict[str, Any], path: Tuple[int, ...]) -> Dict[str, Any]:
+        """按 children 下标路径取出卡牌副本中的字段节点"""
+        node = root
+        for i in path:
+            node = node['children'][i]
+        return node
+
+    def _copy_template(self) -> Dict[str, Any]:
+        """返回模板的深拷贝"""
+        if orjson is not None:
+            return orjson.loads(self._template_bytes)
+        return pickle.loads(self._template_bytes)
+
+    @staticmethod
+    def _iter_nodes(data: Dict[str, Any]):
+        """用显式栈按文档顺序深度优先遍历节点（不受递归深度限制）"""
+        stack = [data]
+        while stack:
+            node = stack.pop()
+            yield node
+            children = node.get('children')
+            if children:
+                stack.extend(reversed(children))
+
     def update_text_field(self, data: Dict[str, Any], field_name: str, value: str):
         """
         更新文本字段
@@ -34,14 +122,10 @@ class CardGenerator:
             field_name: 字段名称
             value: 新值
         """
-        if data.get('type') == 'text' and data.get('name') == field_name:
-            data['text'] = value
-            return True
-
-        if 'children' in data:
-            for child in data['children']:
-                if self.update_text_field(child, field_name, value):
-                    return True
+        for node in self._iter_nodes(data):
+            if node.get('type') == 'text' and node.get('name') == field_name:
+                node['text'] = value
+                return True
 
         return False
 
@@ -54,14 +138,10 @@ class CardGenerator:
             field_name: 字段名称
             value: 新值
         """
-        if data.get('type') == 'image' and data.get('name') == field_name:
-            data['src'] = value
-            return True
-
-        if 'children' in data:
-            for child in data['children']:
-                if self.update_image_field(child, field_name, value):
-                    return True
+        for node in self._iter_nodes(data):
+            if node.get('type') == 'image' and node.get('name') == field_name:
+                node['src'] = value
+                return True
 
         return False
 
@@ -73,55 +153,51 @@ class CardGenerator:
             data: JSON数据
             class_type: 职业类型（如ninja, warrior等）
         """
-        if data.get('type') == 'image' and 'Class' in data.get('name', ''):
-            data['src'] = f"fab/frame/classes/{class_type.lower()}.png"
-            data['thumb'] = f"fab/frame/classes/thumb-{class_type.lower()}.png"
-            data['name'] = f"{class_type.title()} Class"
-            return True
-
-        if 'children' in data:
-            for child in data['children']:
-                if self.update_class_frame(child, class_type):
-                    return True
+        for node in self._iter_nodes(data):
+            if node.get('type') == 'image' and 'Class' in node.get('name', ''):
+                node['src'] = f"fab/frame/classes/{class_type.lower()}.png"
+                node['thumb'] = f"fab/frame/classes/thumb-{class_type.lower()}.png"
+                node['name'] = f"{class_type.title()} Class"
+                return True
 
         return False
 
-    def generate_card(self, row: pd.Series) -> Dict[str, Any]:
+    def generate_card(self, row: Dict[str, Any]) -> Dict[str, Any]:
         """
         从Excel行数据生成单张卡牌JSON
 
         Args:
-            row: Excel行数据
+            row: Excel行数据（字典或 pd.Series 等支持 get 的映射）
 
         Returns:
             完整的卡牌JSON数据
         """
         # 深拷贝模板
-        card_data = json.loads(json.dumps(self.template))
+        card_data = self._copy_template()
+        root = card_data['data']
 
         # 更新文本字段
-        self.update_text_field(card_data['data'], 'Title', str(row.get('card_name', '')))
-        self.update_text_field(card_data['data'], 'Type', str(row.get('card_type', '')))
-        self.update_text_field(card_data['data'], 'Rules', str(row.get('rules_text', '')))
-        self.update_text_field(card_data['data'], 'Cost', str(row.get('cost', '')))
-        self.update_text_field(card_data['data'], 'Left Stat', str(row.get('power', '')))
-        self.update_text_field(card_data['data'], 'Right Stat', str(row.get('defense', '')))
+        for column, path in self._text_paths:
+            self._node_at(root, path)['text'] = str(row.get(column, ''))
 
         # 更新收藏信息
-        artist = row.get('artist', 'Unknown Artist')
-        year = row.get('year', '2024')
-        collector_info = f"{artist} © {year} Legend Story Studios"
-        self.update_text_field(card_data['data'], 'Collector Info', collector_info)
+        if self._collector_path is not None:
+            artist = row.get('artist', 'Unknown Artist')
+            year = row.get('year', '2024')
+            self._node_at(root, self._collector_path)['text'] = f"{artist} © {year} Legend Story Studios"
 
         # 更新图片
         art_path = row.get('art_path', '')
-        if art_path:
-            self.update_image_field(card_data['data'], 'Art', art_path)
+        if art_path and self._art_path is not None:
+            self._node_at(root, self._art_path)['src'] = art_path
 
         # 更新职业框架
         class_type = row.get('class_type', 'ninja')
-        if class_type:
-            self.update_class_frame(card_data['data'], class_type)
+        if class_type and self._class_path is not None:
+            node = self._node_at(root, self._class_path)
+            node['src'] = f"fab/frame/classes/{class_type.lower()}.png"
+            node['thumb'] = f"fab/frame/classes/thumb-{class_type.lower()}.png"
+            node['name'] = f"{class_type.title()} Class"
 
         return card_data
 
@@ -150,27 +226,44 @@ class CardGenerator:
         # 生成卡牌
         success_count = 0
 
-        for idx, row in df.iterrows():
-            try:
-                # 生成卡牌数据
-                card_data = self.generate_card(row)
-
-                # 生成文件名
-                card_name = row.get('card_name', f'card_{idx+1}')
-                # 清理文件名中的非法字符
-                safe_name = "".join(c for c in card_name if c.isalnum() or c in (' ', '-', '_')).strip()
-                safe_name = safe_name.replace(' ', '_')
-
-                # 保存JSON文件
-                output_file = output_path / f"{safe_name}.json"
-                with open(output_file, 'w', encoding='utf-8') as f:
-                    json.dump(card_data, f, indent=4, ensure_ascii=False)
-
-                success_count += 1
-                print(f"✅ 已生成: {output_file}")
-
-            except Exception as e:
-                print(f"❌ 生成第 {idx+1} 张卡牌失败: {e}")
+        # 按行转为普通字典，避免 iterrows 为每行构造 Series 的开销（字典同样支持 row.get）
+        rows = df.to_dict('records')
+
+        # 卡牌数据在主线程生成，序列化与写盘交给线程池并行
+        with concurrent.futures.ThreadPoolExecutor(max_workers=os.cpu_count() or 4) as pool:
+            futures = {}
+            pending = {}
+
+            for idx, row in enumerate(rows):
+                try:
+                    # 生成卡牌数据
+                    card_data = self.generate_card(row)
+
+                    # 生成文件名
+                    card_name = row.get('card_name', f'card_{idx+1}')
+                    # 清理文件名中的非法字符
+                    safe_name = sanitize_filename(card_name)
+
+                    # 保存JSON文件（同名文件需等上一次写完，保持后写覆盖先写）
+                    output_file = output_path / f"{safe_name}.json"
+                    previous = pending.get(output_file)
+                    if previous is not None:
+                        concurrent.futures.wait([previous])
+                    future = pool.submit(write_json, output_file, card_data)
+                    pending[output_file] = future
+                    futures[future] = (idx, output_file)
+
+                except Exception as e:
+                    print(f"❌ 生成第 {idx+1} 张卡牌失败: {e}")
+
+            for future in concurrent.futures.as_completed(futures):
+                idx, output_file = futures[future]
+                try:
+                    future.result()
+                    success_count += 1
+                    print(f"✅ 已生成: {output_file}")
+                except Exception as e:
+                    print(f"❌ 生成第 {idx+1} 张卡牌失败: {e}")
 
         print(f"\n🎉 完成！成功生成 {success_count}/{len(df)} 张卡牌")
 
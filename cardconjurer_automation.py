@@ -7,40 +7,372 @@ CardConjurer自动化模块
 
 import os
 import time
+import shutil
+import json
+import base64
+import logging
+import logging.handlers
+import multiprocessing
+import queue
+import functools
+import contextlib
+import tempfile
+import concurrent.futures
 from pathlib import Path
-from typing import List, Optional
+from typing import Callable, List, Optional, Tuple
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
-from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.chrome.remote_connection import ChromeRemoteConnection
+from selenium.common.exceptions import TimeoutException, WebDriverException
 from PIL import Image
 
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:  # watchdog 为可选依赖，缺失时回退到轮询下载目录
+    Observer = None
+    FileSystemEventHandler = object
+
+try:
+    import orjson
+except ImportError:  # orjson 为可选依赖，缺失时回退到标准库 json
+    orjson = None
+
+try:
+    import pyvips
+except (ImportError, OSError):  # pyvips 为可选依赖（多线程 SIMD 缩放），未安装或缺少 libvips 时使用 Pillow
+    pyvips = None
+
+# 所有浏览器共用的磁盘缓存目录，多次运行间创建器页面的脚本/样式/字体直接命中缓存
+_CHROME_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cardgener', 'chrome-cache')
+# 浏览器磁盘缓存上限（200MB）
+_CHROME_DISK_CACHE_BYTES = 200 * 1024 * 1024
+
+# 像素数超过该值的艺术图在装有 pyvips 时交给 pyvips 缩放
+_VIPS_MIN_PIXELS = 4_000_000
+
+logger = logging.getLogger(__name__)
+
+# 页面元素定位器（模块级常量，每张卡牌复用同一元组）
+# 上传器或文本框，用于判断创建器页面是否可交互
+_UPLOADER = (By.CSS_SELECTOR, "drag-drop-upload, textarea, input[type='file'], .file-upload")
+_DROP_CSS = "drag-drop-upload, .file-upload, [class*='file-upload']"
+_TEXT_INPUT = (By.CSS_SELECTOR, "textarea, input[type='text']")
+
+# 按钮以 (文本正则, mat-icon 文本正则) 描述，由 _FIND_BUTTON_SCRIPT 在页面内用 CSS 选出 button 后匹配，
+# 不再使用 contains()/normalize-space() 的 XPath。文本正则匹配去掉首尾空白后的整段按钮文字
+# 确认按钮必须整段匹配，否则会误中 Download / Upload
+_CONFIRM_BUTTON = ("^(Load|OK|Confirm)$", None)
+# 页面使用 Material 按钮，文本为 Save Image；旧站点可能使用 Download / Export
+_SAVE_BUTTON = ("Save Image", "download")
+_DOWNLOAD_BUTTON = ("Download|Export", None)
+_FIND_BUTTON_SCRIPT = """
+var text = arguments[0] ? new RegExp(arguments[0]) : null;
+var icon = arguments[1] ? new RegExp(arguments[1]) : null;
+var btns = document.querySelectorAll('button');
+for (var i = 0; i < btns.length; i++) {
+  var b = btns[i];
+  // offsetParent 对 position: fixed 的对话框按钮也为 null，改用 getClientRects 判断是否渲染
+  if (b.disabled || b.getClientRects().length === 0) continue;
+  if (text && text.test(b.textContent.replace(/\\s+/g, ' ').trim())) return b;
+  if (icon) {
+    var icons = b.querySelectorAll('mat-icon');
+    for (var j = 0; j < icons.length; j++) { if (icon.test(icons[j].textContent)) return b; }
+  }
+}
+return null;
+"""
+
+
+def _button(spec):
+    """等待条件：返回第一个可见、可用且文本（或 mat-icon 文本）匹配的按钮"""
+    text, icon = spec
+    return lambda driver: driver.execute_script(_FIND_BUTTON_SCRIPT, text, icon)
+
+
+# 卡牌预览画布（页面上面积最大的 canvas）的指纹：缩到 16×16 后的像素值。
+# 画布不存在、尺寸为 0 或被跨域图片污染而无法读取像素时返回 null
+_SIGNATURE_JS = """
+function __ccSignature() {
+  var best = null;
+  document.querySelectorAll('canvas').forEach(function (c) {
+    if (c.width * c.height > (best ? best.width * best.height : 0)) best = c;
+  });
+  if (!best) return null;
+  try {
+    var s = document.createElement('canvas');
+    s.width = 16; s.height = 16;
+    var ctx = s.getContext('2d');
+    ctx.drawImage(best, 0, 0, 16, 16);
+    return Array.prototype.join.call(ctx.getImageData(0, 0, 16, 16).data, ',');
+  } catch (e) { return null; }
+}
+"""
+
+# 载入新卡牌前记录画布指纹作为基准，并清空上一次的就绪状态
+_BASELINE_SCRIPT = _SIGNATURE_JS + "window.__ccLast = null; window.__ccBaseline = __ccSignature();"
+
+# 卡牌就绪检查：预览画布的指纹与载入前的基准不同，且连续两次轮询保持不变（渲染已停止）。
+# 读不到画布指纹时退回通用检查：存在 Save/Download/Export 按钮或已加载的较大图片
+_READY_SCRIPT = _SIGNATURE_JS + """
+var sig = __ccSignature();
+if (sig === null) {
+  var btns = document.querySelectorAll('button');
+  for (var i = 0; i < btns.length; i++) {
+    var t = (btns[i].innerText || btns[i].textContent || '').trim();
+    if (/Save Image|Save|Download|Export|Export Image|Export PNG/i.test(t)) return true;
+  }
+  var imgs = document.images;
+  for (var j = 0; j < imgs.length; j++) { if (imgs[j].naturalWidth > 50) return true; }
+  return false;
+}
+if (sig === window.__ccBaseline) { window.__ccLast = null; return false; }
+var stable = sig === window.__ccLast;
+window.__ccLast = sig;
+return stable;
+"""
+
+# 用JSON文本构造 File 放入上传器的文件输入框，并派发 change/drop 事件让组件识别
+_UPLOAD_SCRIPT = """
+var drop = document.querySelector('drag-drop-upload[filetext="Card"]') || document.querySelector(arguments[2]);
+var input = (drop && drop.querySelector('input[type=file]')) || document.querySelector('input[type=file]');
+if (!input) return 'no-input';
+var dt = new DataTransfer();
+dt.items.add(new File([arguments[0]], arguments[1], {type: 'application/json'}));
+input.files = dt.files;
+input.dispatchEvent(new Event('change', {bubbles: true}));
+if (drop) {
+  try { drop.dispatchEvent(new DragEvent('drop', {dataTransfer: dt, bubbles: true})); } catch (e) {}
+  return 'dropped';
+}
+return 'changed';
+"""
+
+# 关闭与渲染卡牌无关的浏览器功能，降低每个浏览器进程的内存与CPU占用
+# （不禁用图片：卡牌框架与艺术图都需要绘制到画布上）
+_CHROME_LEAN_ARGS = (
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-background-timer-throttling",
+    "--disable-breakpad",
+    "--disable-client-side-phishing-detection",
+    "--disable-default-apps",
+    "--disable-hang-monitor",
+    "--disable-popup-blocking",
+    "--disable-sync",
+    "--disable-translate",
+    "--metrics-recording-only",
+    "--no-first-run",
+    "--mute-audio",
+    "--log-level=3",
+)
+
+
+@functools.lru_cache(maxsize=8)
+def _load_rgba(path: str, mtime: float) -> Image.Image:
+    """解码艺术图为 RGBA 并缓存（键含修改时间，文件更新后自动失效）；返回的图片为共享对象，不可原地修改"""
+    with Image.open(path) as im:
+        return im.convert('RGBA')
+
+
+@functools.lru_cache(maxsize=64)
+def _image_size(path: str, mtime: float) -> Tuple[int, int]:
+    """只读文件头取得图片尺寸，不解码像素"""
+    with Image.open(path) as im:
+        return im.size
+
+
+def _vips_resize(path: str, size: Tuple[int, int]) -> Optional[Image.Image]:
+    """用 pyvips 按目标尺寸缩放 8 位 RGB/RGBA 图片，不适用或失败时返回 None"""
+    try:
+        vi = pyvips.Image.new_from_file(path, access='sequential')
+        if vi.format != 'uchar' or vi.bands not in (3, 4):
+            return None
+        if vi.bands == 3:
+            vi = vi.bandjoin(255)
+        vi = vi.resize(size[0] / vi.width, vscale=size[1] / vi.height, kernel='lanczos3')
+        img = Image.frombuffer('RGBA', (vi.width, vi.height), vi.write_to_memory(), 'raw', 'RGBA', 0, 1)
+    except pyvips.Error:
+        return None
+    if img.size != size:
+        # 取整误差只差一两个像素，补一次廉价缩放即可
+        img = img.resize(size, Image.Resampling.BILINEAR)
+    return img
+
+
+@functools.lru_cache(maxsize=8)
+def _resized_rgba(path: str, mtime: float, size: Tuple[int, int]) -> Image.Image:
+    """同一艺术图按相同尺寸缩放时复用结果"""
+    if pyvips is not None:
+        # 只读文件头取尺寸，交给 pyvips 时不必先用 Pillow 完整解码
+        width, height = _image_size(path, mtime)
+        if width * height > _VIPS_MIN_PIXELS:
+            resized = _vips_resize(path, size)
+            if resized is not None:
+                return resized
+
+    art = _load_rgba(path, mtime)
+
+    # 缩小不到一半且结果不大时 BILINEAR 与 LANCZOS 几乎无差别，速度却快数倍
+    ratio = min(size[0] / art.width, size[1] / art.height)
+    if ratio > 0.5 and max(size) < 1024:
+        return art.resize(size, Image.Resampling.BILINEAR)
+    return art.resize(size, Image.Resampling.LANCZOS)
+
+
+def _is_opaque(img: Image.Image) -> bool:
+    """图片是否没有任何透明像素"""
+    if img.mode in ('RGBA', 'LA', 'PA'):
+        return img.getchannel('A').getextrema() == (255, 255)
+    return 'transparency' not in img.info
+
+
+def _composite_under(base: Image.Image, art: Image.Image, pos: Tuple[int, int]) -> Image.Image:
+    """
+    把 art 放在 base 下层合成
+
+    只对 art 覆盖的区域做 alpha 合成再贴回 base 的副本，区域外的结果就是 base 本身，
+    无需分配整张透明画布、也不必对整张图做合成
+    """
+    x, y = pos
+    box = (max(x, 0), max(y, 0), min(x + art.width, base.width), min(y + art.height, base.height))
+    composed = base.copy()
+    if box[0] >= box[2] or box[1] >= box[3]:
+        return composed
+    under = art.crop((box[0] - x, box[1] - y, box[2] - x, box[3] - y))
+    composed.paste(Image.alpha_composite(under, base.crop(box)), box[:2])
+    return composed
+
+
+def _save_card(img: Image.Image, target: str):
+    """保存卡牌图片；中间产物优先写出速度：PNG 用最低压缩级别，JPEG 省去第二遍哈夫曼优化"""
+    out_dir = os.path.dirname(target)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+
+    if target.lower().endswith('.png'):
+        img.save(target, optimize=False, compress_level=1)
+    else:
+        img.convert('RGB').save(target, quality=90, optimize=False)
+
+
+class _DownloadHandler(FileSystemEventHandler):
+    """把下载目录中新出现的图片文件放入队列（Chrome 先写 .crdownload 再改名，改名事件同样处理）"""
+
+    def __init__(self, exts, found: queue.Queue):
+        super().__init__()
+        self._exts = exts
+        self._found = found
+
+    def _push(self, path: str):
+        if os.path.splitext(path)[1].lower() in self._exts:
+            self._found.put(Path(path))
+
+    def on_created(self, event):
+        if not event.is_directory:
+            self._push(event.src_path)
+
+    def on_moved(self, event):
+        if not event.is_directory:
+            self._push(event.dest_path)
+
 
 class CardConjurerAutomation:
     """CardConjurer自动化类"""
     CREATOR_URL = "https://cardconjurer.com/creator/"
+    # 可识别为下载结果的图片扩展名
+    _IMAGE_EXTS = frozenset({'.png', '.jpg', '.jpeg', '.bmp', '.gif'})
+    # 就地重置页面：清空文件输入框，页面提供 resetCard 时一并调用，再记录画布基准供就绪检查使用
+    RESET_SCRIPT = (
+        "document.querySelectorAll('input[type=file]').forEach(function(i){ i.value = ''; });"
+        "if (typeof window.resetCard === 'function') { window.resetCard(); }"
+        + _BASELINE_SCRIPT
+    )
+    # 一次脚本调用完成载入+渲染+导出：直接调用页面的 loadCard，两帧后返回最大画布（卡牌预览）的 PNG data-URL。
+    # 画布内容与载入前相同（未渲染新卡牌/仍是上一张）或为空白时视为失败；
+    # 页面没有 loadCard、找不到画布或画布被污染时同样返回 null，由调用方回退到上传/下载流程
+    LOAD_AND_RENDER_SCRIPT = """
+var cb = arguments[arguments.length - 1];
+function preview() {
+  var best = null;
+  document.querySelectorAll('canvas').forEach(function (c) {
+    if (c.width * c.height > (best ? best.width * best.height : 0)) best = c;
+  });
+  return best;
+}
+try {
+  var obj = JSON.parse(arguments[0]);
+  if (typeof window.loadCard !== 'function') { cb(null); return; }
+  var before = preview();
+  before = before ? before.toDataURL('image/png') : null;
+  window.card = obj;
+  Promise.resolve(window.loadCard(obj)).then(function () {
+    requestAnimationFrame(function () { requestAnimationFrame(function () {
+      try {
+        var canvas = preview();
+        if (!canvas) { cb(null); return; }
+        var blank = document.createElement('canvas');
+        blank.width = canvas.width;
+        blank.height = canvas.height;
+        var url = canvas.toDataURL('image/png');
+        cb(url === before || url === blank.toDataURL('image/png') ? null : url);
+      } catch (e) { cb(null); }
+    }); });
+  }, function () { cb(null); });
+} catch (e) { cb(null); }
+"""
 
-    def __init__(self, headless: bool = False, download_dir: Optional[str] = None):
+    def __init__(
+        self,
+        headless: bool = True,
+        download_dir: Optional[str] = None,
+        service_url: Optional[str] = None,
+        fast_render: bool = False,
+    ):
         """
         初始化自动化工具
 
         Args:
-            headless: 是否无头模式运行
+            headless: 是否无头模式运行（默认开启，渲染卡牌不需要可见窗口）
             download_dir: 下载目录路径
+            service_url: 已运行的 chromedriver 地址，提供时只在其上新建会话，不再启动新的 chromedriver
+            fast_render: 是否尝试直接调用页面 loadCard 并导出画布（实验性，默认走上传+下载按钮流程）
         """
         self.headless = headless
+        self.fast_render = fast_render
         self.download_dir = download_dir or os.path.join(os.getcwd(), "downloaded_images")
+        self.service_url = service_url
         self.driver = None
+        # 创建器页面是否已加载：加载过后每张卡牌就地重置，不再重新导航/刷新
+        self._page_loaded = False
+        # 浏览器是否接受了 DevTools 下载设置，以及是否确实在 performance 日志中收到过下载事件；
+        # 只有收到过事件后才完全依赖事件，否则回退到文件监听或目录轮询
+        self._cdp_downloads = False
+        self._download_events = False
+        # 下载 guid -> 文件名（downloadWillBegin 与 downloadProgress 可能在不同的日志读取中到达）
+        self._download_names = {}
+        # 系统默认下载目录（下载目录中找不到文件时的回退位置）
+        self._user_downloads = os.path.join(os.path.expanduser('~'), 'Downloads')
+        # 没有 DevTools 下载事件时，用 watchdog 文件事件得知新下载的文件
+        self._observer = None
+        self._downloads = queue.Queue()
+        # JSON目录 -> {文件名: ((修改时间, 大小), Art bounds)}，见 _json_bounds
+        self._bounds_cache = {}
+        # 持久化配置目录被占用时改用的临时配置目录（关闭浏览器时删除）
+        self._temp_profile = None
 
     def setup_driver(self):
         """设置Chrome驱动"""
         chrome_options = Options()
+        # DOMContentLoaded 即返回，不等字体等子资源加载完；真正的就绪由对上传器的显式等待判断
+        chrome_options.page_load_strategy = "eager"
 
         if self.headless:
-            chrome_options.add_argument("--headless")
+            chrome_options.add_argument("--headless=new")
             chrome_options.add_argument("--disable-gpu")
 
         # 设置下载目录
@@ -60,169 +392,258 @@ class CardConjurerAutomation:
         chrome_options.add_argument("--no-sandbox")
         chrome_options.add_argument("--disable-dev-shm-usage")
         chrome_options.add_argument("--window-size=1920,1080")
+        for arg in _CHROME_LEAN_ARGS:
+            chrome_options.add_argument(arg)
+
+        # 磁盘缓存放在固定的共享目录并限制大小；配置目录每次新建、退出时删除，
+        # 并行的工作进程互不锁定配置目录，也不会为每个下载目录留下一份配置
+        self._temp_profile = tempfile.mkdtemp(prefix='cardgener-chrome-')
+        chrome_options.add_argument(f"--user-data-dir={self._temp_profile}")
+        chrome_options.add_argument(f"--disk-cache-dir={_CHROME_CACHE_DIR}")
+        chrome_options.add_argument(f"--disk-cache-size={_CHROME_DISK_CACHE_BYTES}")
+
+        # 通过 performance 日志接收 Page 域的 DevTools 事件（下载开始/进度），不记录网络事件
+        chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+        chrome_options.add_experimental_option("perfLoggingPrefs", {"enableNetwork": False, "enablePage": True})
+
+        self.driver = self._new_driver(chrome_options)
+        # 只使用显式等待，避免隐式等待叠加到每次查找上
+        self.driver.implicitly_wait(0)
+        self._page_loaded = False
+
+        try:
+            # 等同于 execute_cdp_cmd，Remote 驱动上同样可用
+            self.driver.execute("executeCdpCommand", {
+                "cmd": "Browser.setDownloadBehavior",
+                "params": {
+                    "behavior": "allow",
+                    "downloadPath": os.path.abspath(self.download_dir),
+                    "eventsEnabled": True,
+                },
+            })
+            self._cdp_downloads = True
+        except WebDriverException:
+            self._cdp_downloads = self._download_events = False
+
+        if not self._cdp_downloads and Observer is not None:
+            self._start_observer()
+
+    def _new_driver(self, chrome_options: Options):
+        """按配置启动浏览器会话"""
+        if self.service_url:
+            # 连接共享的 chromedriver（ChromeRemoteConnection 带有 DevTools 命令）
+            return webdriver.Remote(
+                command_executor=ChromeRemoteConnection(self.service_url), options=chrome_options
+            )
+        return webdriver.Chrome(options=chrome_options)
+
+    def _start_observer(self):
+        """监听下载目录（及系统 Downloads 目录）中新出现的图片文件"""
+        handler = _DownloadHandler(self._IMAGE_EXTS, self._downloads)
+        observer = Observer()
+        for path in (self.download_dir, self._user_downloads):
+            if os.path.isdir(path):
+                observer.schedule(handler, path, recursive=False)
+        observer.start()
+        self._observer = observer
+
+    def _quit_driver(self):
+        """关闭浏览器与文件监听"""
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+        try:
+            if self.driver:
+                self.driver.quit()
+        finally:
+            # 本次会话的临时配置目录随浏览器一起删除（共享的磁盘缓存保留）
+            if self._temp_profile is not None:
+                shutil.rmtree(self._temp_profile, ignore_errors=True)
+                self._temp_profile = None
 
-        self.driver = webdriver.Chrome(options=chrome_options)
+    def _driver_alive(self) -> bool:
+        """浏览器会话是否仍可用"""
+        try:
+            self.driver.current_url
+            return True
+        except WebDriverException:
+            return False
+
+    def _restart_driver(self):
+        """丢弃失效的会话并重新启动浏览器（页面需重新加载）"""
+        try:
+            self._quit_driver()
+        except WebDriverException:
+            pass
+        self.driver = None
+        self.setup_driver()
+
+    def _prepare_page(self, timeout: float = 6):
+        """首次导入时打开创建器页面，之后复用同一页面（保持JS堆与缓存），仅在上传器缺失时刷新"""
+        if not self._page_loaded:
+            self.driver.get(self.CREATOR_URL)
+            self._maybe(_UPLOADER, timeout=timeout)
+            self._page_loaded = True
+            try:
+                self.driver.execute_script(_BASELINE_SCRIPT)
+            except WebDriverException:
+                pass
+            return
+
+        try:
+            self.driver.execute_script(self.RESET_SCRIPT)
+        except WebDriverException:
+            pass
+
+        if not self.driver.find_elements(*_UPLOADER):
+            # 页面状态异常时才回退为刷新
+            self.driver.refresh()
+
+    @staticmethod
+    def _read_json_text(json_path) -> str:
+        """读取JSON文件文本"""
+        with open(json_path, 'r', encoding='utf-8') as f:
+            return f.read()
 
-    def load_json_to_cardconjurer(self, json_path: str) -> bool:
+    def _maybe(self, locator, timeout: float = 2):
+        """
+        在 timeout 秒内查找可选元素，找不到时立即返回 None 而不抛异常
+
+        Args:
+            locator: (By, selector) 定位器
+            timeout: 最长等待秒数，0 表示只查找一次
+        """
+        try:
+            found = WebDriverWait(self.driver, timeout, poll_frequency=0.1).until(
+                lambda d: d.find_elements(*locator)
+            )
+        except TimeoutException:
+            return None
+        return found[0]
+
+    def load_and_render(self, json_path: str, json_content: Optional[str] = None) -> Optional[str]:
+        """
+        在单次 execute_async_script 中载入JSON并导出渲染结果，省去上传/点击/下载的多次往返
+
+        Args:
+            json_path: JSON文件路径
+            json_content: 已读入的JSON文本，为 None 时从 json_path 读取
+
+        Returns:
+            画布的 PNG data-URL；页面不支持该方式时返回 None
+        """
+        try:
+            self._prepare_page()
+
+            if json_content is None:
+                json_content = self._read_json_text(json_path)
+
+            self.driver.set_script_timeout(10)
+            data_url = self.driver.execute_async_script(self.LOAD_AND_RENDER_SCRIPT, json_content)
+        except (OSError, WebDriverException):
+            return None
+
+        if isinstance(data_url, str) and data_url.startswith('data:image/png;base64,'):
+            return data_url
+        return None
+
+    def save_data_url(self, data_url: str, output_name: str) -> bool:
+        """
+        将画布导出的 data-URL 解码后直接写入下载目录
+
+        Args:
+            data_url: PNG data-URL
+            output_name: 输出文件名（不含扩展名）
+
+        Returns:
+            是否成功保存
+        """
+        try:
+            os.makedirs(self.download_dir, exist_ok=True)
+            target = Path(self.download_dir) / f"{output_name}.png"
+            payload = data_url.split(',', 1)[1]
+            with open(target, 'wb') as f:
+                f.write(base64.b64decode(payload))
+            logger.info("✅ 已导出: %s", target)
+            return True
+        except Exception as e:
+            logger.error("❌ 保存导出图片失败: %s", e)
+            return False
+
+    def load_json_to_cardconjurer(self, json_path: str, json_content: Optional[str] = None) -> bool:
         """
         加载JSON文件到CardConjurer
 
         Args:
             json_path: JSON文件路径
+            json_content: 已读入的JSON文本，为 None 时从 json_path 读取
 
         Returns:
             是否成功加载
         """
         try:
-            # 仅在当前不是创建器页面时导航（允许调用方先预加载页面并在每次导入前刷新）
-            creator = getattr(self, 'CREATOR_URL', "https://cardconjurer.com/creator/")
-            try:
-                if not self.driver.current_url.startswith(creator):
-                    self.driver.get(creator)
-            except Exception:
-                # 如果 current_url 不可用或其它问题，做一次导航以确保处于目标页面
-                self.driver.get(creator)
-
-            # 等待页面加载完成并等待上传器或文本区域出现（防止第一次导入过早执行）
+            # 首次导入时打开创建器页面，之后就地重置复用
             wait = WebDriverWait(self.driver, 6)
-            try:
-                wait.until(lambda d: d.execute_script("return document.readyState") == 'complete')
-            except TimeoutException:
-                pass
+            self._prepare_page()
 
-            try:
-                wait.until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, "drag-drop-upload, textarea, input[type='file'], .file-upload"))
-                )
-            except TimeoutException:
-                # 如果没有检测到这些元素，短暂回退等待以提高兼容性
-                time.sleep(1)
+            # 等待上传器或文本区域出现（防止第一次导入过早执行）；
+            # 没有检测到这些元素时继续尝试，后续步骤各自有等待条件
+            self._maybe(_UPLOADER, timeout=6)
 
             # 读取JSON内容
-            with open(json_path, 'r', encoding='utf-8') as f:
-                json_content = f.read()
+            if json_content is None:
+                json_content = self._read_json_text(json_path)
 
-            # 页面使用自定义的 drag-drop-upload 组件，包含一个文件输入框
-            # 尝试通过 input[type=file] 上传 JSON 文件（优先针对 filetext="Card" 的上传器）
+            # 页面使用自定义的 drag-drop-upload 组件，包含一个文件输入框（优先针对 filetext="Card" 的上传器）；
+            # 直接在页面内用JSON文本构造 File 放入输入框并派发 change/drop 事件，
+            # 省去 send_keys 的文件上传与多次脚本往返
             try:
-                wrapper = None
-                try:
-                    # 仅定位特定上传组件，不执行点击
-                    wrapper = wait.until(
-                        EC.presence_of_element_located((By.CSS_SELECTOR, 'drag-drop-upload[filetext="Card"]'))
-                    )
-                except Exception:
-                    # 回退到通用上传器选择器（仅定位，不点击）
-                    try:
-                        wrapper = wait.until(
-                            EC.presence_of_element_located((By.CSS_SELECTOR, "drag-drop-upload, .file-upload, [class*='file-upload']"))
-                        )
-                    except Exception:
-                        wrapper = None
-
-                abs_path = os.path.abspath(str(json_path))
-                file_input = None
-                if wrapper:
-                    try:
-                        file_input = wrapper.find_element(By.CSS_SELECTOR, "input[type='file']")
-                    except Exception:
-                        file_input = None
-                if file_input is None:
-                    file_input = wait.until(
-                        EC.presence_of_element_located((By.CSS_SELECTOR, "input[type='file']"))
-                    )
-
-                file_input.send_keys(abs_path)
-                time.sleep(0.5)
-
-                # 触发组件的 change/drop 事件以模拟拖拽，让组件识别已选文件
-                try:
-                    if wrapper:
-                        try:
-                            self.driver.execute_script("arguments[0].dispatchEvent(new Event('change', {bubbles:true}));", wrapper)
-                        except Exception:
-                            pass
-                        try:
-                            self.driver.execute_script(
-                                "var dt=new DataTransfer(); for(var i=0;i<arguments[0].files.length;i++){dt.items.add(arguments[0].files[i]);} arguments[1].dispatchEvent(new DragEvent('drop',{dataTransfer:dt,bubbles:true}));",
-                                file_input,
-                                wrapper,
-                            )
-                        except Exception:
-                            try:
-                                self.driver.execute_script("arguments[0].dispatchEvent(new Event('change', {bubbles:true}));", file_input)
-                            except Exception:
-                                pass
-                    else:
-                        script = '''
-var drop = document.querySelector(arguments[0]);
-var input = document.querySelector("input[type=file]");
-if(!input) return 'no-input';
-var dt = new DataTransfer();
-for(var i=0;i<input.files.length;i++){ dt.items.add(input.files[i]); }
-if(drop){
-  try{ drop.dispatchEvent(new Event('change', {bubbles:true})); }catch(e){}
-  try{ drop.dispatchEvent(new DragEvent('drop', {dataTransfer: dt, bubbles:true})); }catch(e){}
-  return 'dropped';
-}
-return 'no-drop';
-'''
-                        try:
-                            self.driver.execute_script(script, "drag-drop-upload, .file-upload, [class*='file-upload']")
-                        except Exception:
-                            try:
-                                self.driver.execute_script("arguments[0].dispatchEvent(new Event('change', {bubbles:true}));", file_input)
-                            except Exception:
-                                pass
-                except Exception:
-                    pass
-
-                time.sleep(0.5)
+                status = self.driver.execute_script(
+                    _UPLOAD_SCRIPT, json_content, os.path.basename(str(json_path)), _DROP_CSS
+                )
+                if status == 'no-input':
+                    raise WebDriverException("未找到文件输入框")
             except Exception as e:
-                print(f"⚠️ 未能通过 file input 上传：{e}，尝试回退方案...")
+                logger.warning("⚠️ 未能通过 file input 上传：%s，尝试回退方案...", e)
                 # 回退到 textarea 注入（兼容旧实现）
+                json_input = self._maybe(_TEXT_INPUT, timeout=0)
                 try:
-                    json_input = wait.until(
-                        EC.presence_of_element_located((By.CSS_SELECTOR, "textarea, input[type='text']"))
-                    )
-                    json_input.clear()
-                    json_input.send_keys(json_content)
-                    time.sleep(1)
-                except Exception as e2:
-                    # 最后一招：使用 JS 注入到 textarea（如果存在）
-                    try:
+                    if json_input is None:
+                        # 最后一招：使用 JS 注入到 textarea（如果存在）
                         script = f"var ta = document.querySelector('textarea'); if(ta) ta.value = `{json_content}`;"
                         self.driver.execute_script(script)
-                        time.sleep(1)
-                    except Exception as e3:
-                        print(f"❌ 注入 JSON 失败: {e3}")
-                        return False
+                    else:
+                        json_input.clear()
+                        json_input.send_keys(json_content)
+                except Exception as e2:
+                    logger.error("❌ 注入 JSON 失败: %s", e2)
+                    return False
 
-            # 有些页面在文件选择后需要点击确认或 Load 按钮，尝试点击常见的按钮
+            # 有些页面在文件选择后需要点击确认或 Load 按钮，尝试点击常见的按钮；
+            # 没有确认按钮时也可能已自动加载，不再等满超时
             try:
-                confirm_button = wait.until(
-                    EC.element_to_be_clickable(
-                        (By.XPATH, "//button[contains(., 'Load') or contains(., 'OK') or contains(., 'Confirm')]")
-                    )
-                )
-                confirm_button.click()
-                time.sleep(2)
-            except Exception:
-                # 如果没有确认按钮，也可能已自动加载
-                pass
+                confirm_button = WebDriverWait(self.driver, 1, poll_frequency=0.1).until(_button(_CONFIRM_BUTTON))
+            except TimeoutException:
+                confirm_button = None
+            if confirm_button is not None:
+                try:
+                    confirm_button.click()
+                    # 确认按钮（或其所在对话框）消失即表示已开始加载
+                    wait.until(EC.invisibility_of_element(confirm_button))
+                except (TimeoutException, WebDriverException):
+                    pass
 
             # 等待卡牌内容准备就绪（Save/Download 按钮出现，或 canvas/img 渲染完成）
             try:
-                if not self._wait_for_card_ready(timeout=6):
-                    # 最后尝试给页面多一点时间，但不要无限等待
-                    time.sleep(1)
+                self._wait_for_card_ready(timeout=6)
             except Exception:
                 pass
 
             return True
 
         except Exception as e:
-            print(f"❌ 加载JSON失败: {e}")
+            logger.error("❌ 加载JSON失败: %s", e)
             return False
 
     def download_card_image(self, output_name: str) -> bool:
@@ -238,138 +659,171 @@ return 'no-drop';
         try:
             wait = WebDriverWait(self.driver, 10)
 
+            # 丢弃之前遗留的文件事件，只认本次点击后的下载
+            while not self._downloads.empty():
+                self._downloads.get_nowait()
+
             # 查找下载/保存按钮，页面使用 Material 按钮，文本为 Save Image
             try:
-                download_button = wait.until(
-                    EC.element_to_be_clickable(
-                        (By.XPATH, "//button[.//mat-icon[contains(normalize-space(.),'download')] or contains(normalize-space(.),'Save Image') or contains(., 'Save Image')]")
-                    )
-                )
+                download_button = wait.until(_button(_SAVE_BUTTON))
                 download_button.click()
             except Exception:
                 # 回退：旧站点可能使用 'Download' 或 'Export' 文本
                 try:
-                    download_button = wait.until(
-                        EC.element_to_be_clickable(
-                            (By.XPATH, "//button[contains(., 'Download') or contains(., 'Export')]")
-                        )
-                    )
+                    download_button = wait.until(_button(_DOWNLOAD_BUTTON))
                     download_button.click()
                 except Exception as e:
-                    print(f"❌ 未找到下载按钮: {e}")
+                    logger.error("❌ 未找到下载按钮: %s", e)
                     return False
 
-                
-
             # 等待并查找下载完成的文件（优先在 self.download_dir，其次尝试系统默认 Downloads）
             wait_time = 15
-            poll_interval = 0.5
+            # 轮询间隔从 50ms 起逐次加倍到 0.5s：下载很快完成时不必多等一整个周期
+            poll_interval = 0.05
             end_time = time.time() + wait_time
 
-            def find_new_file(search_dir, since_ts):
-                exts = {'.png', '.jpg', '.jpeg', '.bmp', '.gif'}
-                candidates = []
-                try:
-                    for p in Path(search_dir).glob('*'):
-                        try:
-                            if p.is_file() and p.suffix.lower() in exts and os.path.getmtime(p) >= since_ts:
-                                candidates.append(p)
-                        except Exception:
-                            continue
-                except Exception:
-                    return None
-                if not candidates:
-                    return None
-                candidates.sort(key=os.path.getmtime, reverse=True)
-                return candidates[0]
-
             # 记录点击前时间戳，寻找之后产生的新文件
             since_ts = time.time() - 1
 
             latest_file = None
-            while time.time() < end_time and latest_file is None:
+            if self._cdp_downloads and not self._download_events:
+                # 尚未确认下载事件会写入 performance 日志：短暂试探，没收到任何事件就改用文件监听/目录轮询
+                latest_file = self._wait_for_download(min(2, wait_time))
+                if not self._download_events:
+                    self._cdp_downloads = False
+                    logger.info("未收到 DevTools 下载事件，改用文件监听/目录轮询")
+                    if Observer is not None and self._observer is None:
+                        self._start_observer()
+                    # 监听启动前文件可能已经下载完成，先扫描一次目录
+                    latest_file = self._find_new(self.download_dir, since_ts)
+
+            if self._download_events:
+                # 由下载完成事件直接给出文件，不再扫描目录；事件未到达时只做一次目录检查兜底
+                if latest_file is None:
+                    latest_file = self._wait_for_download(max(0.0, end_time - time.time()))
+                if latest_file is None or not latest_file.is_file():
+                    latest_file = self._find_new(self.download_dir, since_ts)
+            elif latest_file is None and self._observer is not None:
+                # 由文件系统事件通知新文件，无需扫描目录
+                try:
+                    latest_file = self._downloads.get(timeout=max(0.0, end_time - time.time()))
+                except queue.Empty:
+                    latest_file = None
+
+            while not self._download_events and self._observer is None and time.time() < end_time and latest_file is None:
                 # 优先检查目标下载目录
-                latest_file = find_new_file(self.download_dir, since_ts)
+                latest_file = self._find_new(self.download_dir, since_ts)
                 if latest_file:
                     break
                 # 回退检查当前用户 Downloads 目录（Windows 常用位置）
-                try:
-                    user_download = os.path.join(os.path.expanduser('~'), 'Downloads')
-                    latest_file = find_new_file(user_download, since_ts)
-                    if latest_file:
-                        break
-                except Exception:
-                    pass
+                latest_file = self._find_new(self._user_downloads, since_ts)
+                if latest_file:
+                    break
 
                 time.sleep(poll_interval)
+                poll_interval = min(poll_interval * 2, 0.5)
 
             if not latest_file:
-                print("❌ 未检测到下载的图片文件")
+                logger.error("❌ 未检测到下载的图片文件")
                 return False
 
             # 确保目标目录存在
             os.makedirs(self.download_dir, exist_ok=True)
             new_name = Path(self.download_dir) / f"{output_name}{latest_file.suffix}"
             try:
+                src, dst = os.fspath(latest_file), os.fspath(new_name)
                 # 如果源路径与目标路径相同，直接返回成功
-                try:
-                    if latest_file.resolve() == new_name.resolve():
-                        print(f"✅ 已下载（原地）: {new_name}")
-                        return True
-                except Exception:
-                    # resolve 可能失败于不存在的文件，继续处理
-                    pass
-
-                # 如果目标已存在且不是源文件，先删除目标再移动
-                if new_name.exists():
-                    new_name.unlink()
+                if os.path.exists(dst) and os.path.samefile(src, dst):
+                    logger.info("✅ 已下载（原地）: %s", new_name)
+                    return True
 
-                latest_file.replace(new_name)
-                print(f"✅ 已下载并移动: {new_name}")
+                # os.replace 原子地覆盖已存在的目标文件
+                os.replace(src, dst)
+                logger.info("✅ 已下载并移动: %s", new_name)
                 return True
             except Exception as e:
-                print(f"❌ 重命名/移动下载文件失败: {e}")
+                logger.error("❌ 重命名/移动下载文件失败: %s", e)
                 return False
 
         except Exception as e:
-            print(f"❌ 下载图片失败: {e}")
+            logger.error("❌ 下载图片失败: %s", e)
             return False
 
+    def _find_new(self, search_dir: str, since_ts: float) -> Optional[Path]:
+        """在目录中查找 since_ts 之后产生的最新图片文件（scandir 的目录项自带 stat 缓存）"""
+        latest = None
+        latest_mtime = since_ts
+        try:
+            with os.scandir(search_dir) as it:
+                for entry in it:
+                    try:
+                        if os.path.splitext(entry.name)[1].lower() not in self._IMAGE_EXTS or not entry.is_file():
+                            continue
+                        mtime = entry.stat().st_mtime
+                    except OSError:
+                        continue
+                    if mtime >= latest_mtime:
+                        latest, latest_mtime = entry.path, mtime
+        except OSError:
+            return None
+        return Path(latest) if latest else None
+
+    def _wait_for_download(self, timeout: float) -> Optional[Path]:
+        """
+        等待 DevTools 下载事件：downloadWillBegin 给出文件名，downloadProgress 为 completed 时返回文件路径。
+        收到任何下载事件即确认事件可用（设置 _download_events）
+
+        Returns:
+            下载完成的文件路径；超时、被取消或日志不可用时返回 None
+        """
+        names = self._download_names
+        end_time = time.monotonic() + timeout
+        while time.monotonic() < end_time:
+            try:
+                entries = self.driver.get_log("performance")
+            except WebDriverException:
+                return None
+
+            for entry in entries:
+                try:
+                    message = json.loads(entry["message"])["message"]
+                except (KeyError, ValueError, TypeError):
+                    continue
+                method = message.get("method", "")
+                params = message.get("params", {})
+                if method.endswith(".downloadWillBegin"):
+                    self._download_events = True
+                    names[params.get("guid")] = params.get("suggestedFilename")
+                elif method.endswith(".downloadProgress"):
+                    self._download_events = True
+                    state = params.get("state")
+                    guid = params.get("guid")
+                    if state == "completed" and names.get(guid):
+                        return Path(self.download_dir) / names.pop(guid)
+                    if state == "canceled":
+                        names.pop(guid, None)
+                        return None
+
+            time.sleep(0.05)
+        return None
+
     def _wait_for_card_ready(self, timeout: int = 6) -> bool:
         """
-        等待页面上卡牌渲染完成的通用检查：
-        - 查找可点击的 Save/Download/Export 按钮
-        - 或者页面包含 canvas 元素
-        - 或者存在已加载的 img（naturalWidth > 50）
+        等待页面上本张卡牌渲染完成：
+        - 预览画布与载入前（_BASELINE_SCRIPT 记录的基准）不同，且连续两次轮询不再变化
+        - 读不到画布像素时退回通用检查：存在 Save/Download/Export 按钮或已加载的 img（naturalWidth > 50）
 
         返回 True 表示已就绪，False 表示超时。
         """
         if not self.driver:
             return False
 
-        end_time = time.time() + int(timeout)
-        poll = 0.5
-
-        check_script = (
-            "var btns = Array.from(document.querySelectorAll('button'));"
-            "for(var i=0;i<btns.length;i++){var t=(btns[i].innerText||btns[i].textContent||'').trim();"
-            "if(/Save Image|Save|Download|Export|Export Image|Export PNG/i.test(t)) return true;}"
-            "if(document.querySelector('canvas')) return true;"
-            "var imgs = Array.from(document.images); for(var j=0;j<imgs.length;j++){ if(imgs[j].naturalWidth && imgs[j].naturalWidth>50) return true;}"
-            "return false;"
-        )
-
-        while time.time() < end_time:
-            try:
-                ok = self.driver.execute_script(check_script)
-                if ok:
-                    return True
-            except Exception:
-                # 忽略脚本执行错误，继续重试
-                pass
-            time.sleep(poll)
-
-        return False
+        # 画布绘制不触发 DOM 变化，每次轮询都重新取指纹比较；脚本执行错误视为尚未就绪
+        wait = WebDriverWait(self.driver, timeout, poll_frequency=0.15, ignored_exceptions=(WebDriverException,))
+        try:
+            return bool(wait.until(lambda d: d.execute_script(_READY_SCRIPT)))
+        except TimeoutException:
+            return False
 
     def overlay_art_on_card_with_bounds(self, base_card_path: str, art_path: str, bounds: dict, output_path: Optional[str] = None) -> bool:
         """
@@ -378,8 +832,18 @@ return 'no-drop';
         bounds: dict 应包含 x, y, width, height, 可选 type('fill'|'fit'), horizontal, vertical。
         """
         try:
-            base = Image.open(base_card_path).convert('RGBA')
-            art = Image.open(art_path).convert('RGBA')
+            base = Image.open(base_card_path)
+            target = output_path or base_card_path
+            if _is_opaque(base):
+                # 卡牌完全不透明时底层的艺术图会被整个遮住，结果就是原卡牌图：跳过艺术图解码、缩放与合成
+                if os.path.abspath(target) != os.path.abspath(base_card_path):
+                    _save_card(base, target)
+                logger.info("✅ 卡牌不透明，无需叠加: %s", target)
+                return True
+            base = base.convert('RGBA')
+            art_mtime = os.path.getmtime(art_path)
+            # 此处只需尺寸，像素解码留给 _resized_rgba（交给 pyvips 时完全不经 Pillow 解码）
+            aw, ah = _image_size(art_path, art_mtime)
 
             bw, bh = base.size
 
@@ -389,7 +853,6 @@ return 'no-drop';
             bheight = int(bounds.get('height', bh))
 
             # 计算按 type 缩放：'fill' 为 cover，其他为 contain
-            aw, ah = art.size
             if bounds.get('type') == 'fill':
                 scale = max(bwidth / aw, bheight / ah)
             else:
@@ -397,7 +860,7 @@ return 'no-drop';
 
             new_w = max(1, int(aw * scale))
             new_h = max(1, int(ah * scale))
-            art_resized = art.resize((new_w, new_h), Image.Resampling.LANCZOS)
+            art_resized = _resized_rgba(art_path, art_mtime, (new_w, new_h))
 
             # 根据 horizontal/vertical 对齐
             horiz = bounds.get('horizontal', 'center')
@@ -418,24 +881,14 @@ return 'no-drop';
                 ay = by + (bheight - new_h) // 2
 
             # 将 art 放在底层，然后把 base 盖在上面（保持卡牌前景覆盖）
-            composed = Image.new('RGBA', base.size, (0, 0, 0, 0))
-            composed.paste(art_resized, (ax, ay), art_resized)
-            composed.paste(base, (0, 0), base)
+            composed = _composite_under(base, art_resized, (ax, ay))
 
-            target = output_path or base_card_path
-            out_dir = os.path.dirname(target)
-            if out_dir:
-                os.makedirs(out_dir, exist_ok=True)
+            _save_card(composed, target)
 
-            if target.lower().endswith('.png'):
-                composed.save(target)
-            else:
-                composed.convert('RGB').save(target)
-
-            print(f"✅ 已按 bounds 叠加并保存: {target}")
+            logger.info("✅ 已按 bounds 叠加并保存: %s", target)
             return True
         except Exception as e:
-            print(f"❌ 按 bounds 叠加失败 ({base_card_path} <- {art_path}): {e}")
+            logger.error("❌ 按 bounds 叠加失败 (%s <- %s): %s", base_card_path, art_path, e)
             return False
 
     def overlay_art_on_card(self, base_card_path: str, art_path: str, output_path: Optional[str] = None, margin_ratio: float = 0.05) -> bool:
@@ -443,41 +896,40 @@ return 'no-drop';
         退化的居中叠加行为（当 JSON bounds 不可用时使用）。
         """
         try:
-            base = Image.open(base_card_path).convert("RGBA")
-            art = Image.open(art_path).convert("RGBA")
+            base = Image.open(base_card_path)
+            target = output_path or base_card_path
+            if _is_opaque(base):
+                # 卡牌完全不透明时底层的艺术图会被整个遮住，结果就是原卡牌图：跳过艺术图解码、缩放与合成
+                if os.path.abspath(target) != os.path.abspath(base_card_path):
+                    _save_card(base, target)
+                logger.info("✅ 卡牌不透明，无需叠加: %s", target)
+                return True
+            base = base.convert('RGBA')
+            art_mtime = os.path.getmtime(art_path)
+            # 此处只需尺寸，像素解码留给 _resized_rgba（交给 pyvips 时完全不经 Pillow 解码）
+            aw, ah = _image_size(art_path, art_mtime)
 
             bw, bh = base.size
             max_w = int(bw * (1.0 - 2 * margin_ratio))
             max_h = int(bh * (1.0 - 2 * margin_ratio))
 
-            aw, ah = art.size
             scale = min(max_w / aw, max_h / ah, 1.0)
             new_w = max(1, int(aw * scale))
             new_h = max(1, int(ah * scale))
-            art_resized = art.resize((new_w, new_h), Image.Resampling.LANCZOS)
+            art_resized = _resized_rgba(art_path, art_mtime, (new_w, new_h))
 
             x = (bw - new_w) // 2
             y = (bh - new_h) // 2
 
             # 将 art 放在底层，再把 base 盖上（保证卡牌在上层）
-            composed = Image.new('RGBA', base.size, (0, 0, 0, 0))
-            composed.paste(art_resized, (x, y), art_resized)
-            composed.paste(base, (0, 0), base)
+            composed = _composite_under(base, art_resized, (x, y))
 
-            target = output_path or base_card_path
-            out_dir = os.path.dirname(target)
-            if out_dir:
-                os.makedirs(out_dir, exist_ok=True)
-
-            if target.lower().endswith('.png'):
-                composed.save(target)
-            else:
-                composed.convert('RGB').save(target)
+            _save_card(composed, target)
 
-            print(f"✅ 已将艺术图叠加并保存: {target}")
+            logger.info("✅ 已将艺术图叠加并保存: %s", target)
             return True
         except Exception as e:
-            print(f"❌ 叠加艺术图失败 ({base_card_path} <- {art_path}): {e}")
+            logger.error("❌ 叠加艺术图失败 (%s <- %s): %s", base_card_path, art_path, e)
             return False
 
     def overlay_generated_art(self, art_dir: str, source_dir: Optional[str] = None, json_dir: Optional[str] = None, inplace: bool = True, margin_ratio: float = 0.05) -> int:
@@ -494,36 +946,17 @@ return 'no-drop';
             json_p = Path(json_dir) if json_dir else None
 
             if not art_dir_p.exists() or not src_p.exists():
-                print(f"❌ 指定目录不存在: art_dir={art_dir} source_dir={src}")
+                logger.error("❌ 指定目录不存在: art_dir=%s source_dir=%s", art_dir, src)
                 return 0
 
             # map art files by stem
             art_files = {p.stem: p for p in art_dir_p.iterdir() if p.suffix.lower() in ('.png', '.jpg', '.jpeg')}
 
             # map json bounds by stem when available
-            json_bounds = {}
-            if json_p and json_p.exists():
-                for jp in json_p.glob('*.json'):
-                    try:
-                        import json as _json
-                        data = _json.loads(jp.read_text(encoding='utf-8'))
-                        # 寻找 Art image 的 bounds
-                        def find_art_bounds(obj):
-                            if isinstance(obj, dict):
-                                if obj.get('type') == 'image' and obj.get('name') == 'Art':
-                                    return obj.get('bounds')
-                                for v in obj.get('children', []):
-                                    res = find_art_bounds(v)
-                                    if res:
-                                        return res
-                            return None
-
-                        b = find_art_bounds(data.get('data', {}))
-                        if b:
-                            json_bounds[jp.stem] = b
-                    except Exception:
-                        continue
+            json_bounds = self._json_bounds(json_p) if json_p and json_p.exists() else {}
 
+            # 先收集全部叠加任务，再交给进程池并行执行（每张卡牌的缩放与合成互不依赖）
+            tasks = []
             for base_file in src_p.iterdir():
                 if base_file.suffix.lower() not in ('.png', '.jpg', '.jpeg'):
                     continue
@@ -544,94 +977,206 @@ return 'no-drop';
                 target = str(base_file) if inplace else str(base_file.with_name(f"{base_file.stem}_with_art{base_file.suffix}"))
 
                 # if we have bounds for this stem, use it
-                bounds = json_bounds.get(stem)
-                if bounds:
-                    ok = self.overlay_art_on_card_with_bounds(str(base_file), str(art_path), bounds, target)
-                else:
-                    ok = self.overlay_art_on_card(str(base_file), str(art_path), target, margin_ratio=margin_ratio)
-
-                if ok:
-                    count += 1
+                tasks.append((str(base_file), str(art_path), json_bounds.get(stem), target, margin_ratio))
+
+            if len(tasks) > 1:
+                with _worker_log_queue() as log_queue, concurrent.futures.ProcessPoolExecutor(
+                    max_workers=min(len(tasks), os.cpu_count() or 1),
+                    initializer=_init_worker_logging,
+                    initargs=(log_queue, logger.getEffectiveLevel()),
+                ) as pool:
+                    count = sum(1 for ok in pool.map(_overlay_one, *zip(*tasks)) if ok)
+            else:
+                count = sum(1 for task in tasks if _overlay_one(*task))
 
-            print(f"🎉 完成叠加: 成功处理 {count} 张图片")
+            logger.info("🎉 完成叠加: 成功处理 %s 张图片", count)
             return count
 
         except Exception as e:
-            print(f"❌ 批量叠加失败: {e}")
+            logger.error("❌ 批量叠加失败: %s", e)
             return count
 
-    def batch_import_and_download(self, json_files: List[str]) -> int:
+    def _json_bounds(self, json_p: Path) -> dict:
+        """
+        读取目录中每个JSON的 Art bounds（按文件名stem索引）
+
+        每个文件的结果按 (修改时间, 大小) 缓存在本实例内存中，再次叠加同一目录时只重新解析有变化的JSON
+        """
+        directory = str(json_p.resolve())
+        previous = self._bounds_cache.get(directory, {})
+        current = {}
+        with os.scandir(json_p) as it:
+            for entry in it:
+                if not entry.name.endswith('.json') or not entry.is_file():
+                    continue
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                sig = (st.st_mtime_ns, st.st_size)
+                cached = previous.get(entry.name)
+                current[entry.name] = cached if cached and cached[0] == sig else (sig, self._read_art_bounds(entry.path))
+        # 只保留目录中现存的文件，删除的JSON不再占用缓存
+        self._bounds_cache[directory] = current
+
+        return {os.path.splitext(name)[0]: b for name, (_, b) in current.items() if b}
+
+    @staticmethod
+    def _read_art_bounds(path: str) -> Optional[dict]:
+        """解析单个JSON中 Art 字段的 bounds，没有或无法解析时返回 None"""
+        try:
+            with open(path, 'rb') as f:
+                raw = f.read()
+            # 不含 Art 字段的 JSON 无需解析
+            if b'"Art"' not in raw:
+                return None
+            data = orjson.loads(raw) if orjson is not None else json.loads(raw)
+            return _find_art_bounds(data.get('data', {}))
+        except Exception:
+            return None
+
+    def batch_import_and_download(
+        self,
+        json_files: List[str],
+        max_workers: int = 1,
+        progress_cb: Optional[Callable[[int], None]] = None,
+    ) -> int:
         """
         批量导入JSON文件并下载图片
 
+        单进程时每张卡牌依次上传、渲染、点击保存并等待下载完成；只有开启 fast_render
+        （--fast-render）时，导出图片的解码与写盘才放到后台线程，与下一张卡牌的渲染重叠
+
         Args:
             json_files: JSON文件路径列表
+            max_workers: 并行的浏览器进程数，大于1时分片交给多个独立的Chrome实例处理
+            progress_cb: 进度回调，参数为已处理完的卡牌数（并行时按分片完成上报）
 
         Returns:
             成功处理的数量
         """
-        success_count = 0
+        if max_workers > 1 and len(json_files) > 1:
+            return self._parallel_import_and_download(json_files, max_workers, progress_cb)
 
-        try:
-            self.setup_driver()
+        success_count = 0
 
-            # 预先加载一次创建器页面，给页面额外时间完成首次加载（可避免首条导入过早触发的问题）
+        # 启动浏览器前一次性准备好 (绝对路径, 文件名, JSON文本)，读盘与路径处理不再与浏览器操作交错
+        jobs = []
+        for json_file in json_files:
             try:
-                creator = getattr(self, 'CREATOR_URL', "https://cardconjurer.com/creator/")
-                self.driver.get(creator)
-                initial_wait = WebDriverWait(self.driver, 6)
-                try:
-                    initial_wait.until(lambda d: d.execute_script("return document.readyState") == 'complete')
-                except Exception:
-                    pass
-                try:
-                    initial_wait.until(
-                        EC.presence_of_element_located((By.CSS_SELECTOR, "drag-drop-upload, textarea, input[type='file'], .file-upload"))
-                    )
-                except Exception:
-                    time.sleep(1)
-                # 额外短暂停顿让页面内部脚本稳定
-                time.sleep(1)
-            except Exception:
-                pass
+                jobs.append((os.path.abspath(json_file), Path(json_file).stem, self._read_json_text(json_file)))
+            except OSError as e:
+                logger.warning("⚠️ 读取失败: %s: %s", json_file, e)
 
-            wait = WebDriverWait(self.driver, 6)
+        # fast_render 导出的图片交给后台线程解码写盘，浏览器同时开始处理下一张卡牌；
+        # 默认的下载按钮路径由浏览器自己写盘，用不到后台线程
+        saver = concurrent.futures.ThreadPoolExecutor(max_workers=2) if self.fast_render else None
+        saves = {}
 
-            for json_file in json_files:
-                print(f"\n处理: {json_file}")
+        try:
+            self.setup_driver()
 
-                # 在处理每个 JSON 前刷新页面以确保上传器处于可交互状态
-                try:
-                    self.driver.refresh()
-                    try:
-                        wait.until(
-                            EC.presence_of_element_located((By.CSS_SELECTOR, "drag-drop-upload, textarea, input[type='file'], .file-upload"))
-                        )
-                    except Exception:
-                        time.sleep(0.5)
-                except Exception:
-                    # 刷新失败则继续尝试直接导入
-                    pass
+            for done, (json_file, file_name, json_content) in enumerate(jobs):
+                if progress_cb:
+                    progress_cb(done)
+                logger.info("处理: %s", json_file)
 
-                # 加载JSON（函数内部只在非创建器页面时导航）
-                if self.load_json_to_cardconjurer(json_file):
+                # 开启 fast_render 时先尝试在页面内一次完成载入与导出，不支持时回退到上传+下载按钮
+                data_url = self.load_and_render(json_file, json_content) if self.fast_render else None
+                if data_url is not None:
+                    saves[saver.submit(self.save_data_url, data_url, file_name)] = json_file
+                    continue
+
+                # 加载JSON（首张卡牌打开创建器页面，之后复用同一页面）
+                if self.load_json_to_cardconjurer(json_file, json_content):
                     # 下载图片
-                    file_name = Path(json_file).stem
                     if self.download_card_image(file_name):
                         success_count += 1
-                    else:
-                        print(f"⚠️ 下载失败: {json_file}")
+                        continue
+                    logger.warning("⚠️ 下载失败: %s", json_file)
                 else:
-                    print(f"⚠️ 加载失败: {json_file}")
+                    logger.warning("⚠️ 加载失败: %s", json_file)
 
-                # 短暂延迟避免请求过快
-                time.sleep(1)
+                # 浏览器崩溃时只重启驱动，批次内剩余卡牌继续处理
+                if not self._driver_alive():
+                    logger.warning("⚠️ 浏览器会话已失效，正在重新启动")
+                    self._restart_driver()
 
         except Exception as e:
-            print(f"❌ 批量处理出错: {e}")
+            logger.error("❌ 批量处理出错: %s", e)
         finally:
-            if self.driver:
-                self.driver.quit()
+            self._quit_driver()
+            if saver is not None:
+                saver.shutdown(wait=True)
+
+        for future, json_file in saves.items():
+            if future.result():
+                success_count += 1
+            else:
+                logger.warning("⚠️ 下载失败: %s", json_file)
+
+        if progress_cb:
+            progress_cb(len(json_files))
+        return success_count
+
+    def _parallel_import_and_download(
+        self,
+        json_files: List[str],
+        max_workers: int,
+        progress_cb: Optional[Callable[[int], None]] = None,
+    ) -> int:
+        """
+        将JSON文件分片到多个进程，每个进程使用独立的浏览器和下载子目录，完成后把图片汇总到下载目录
+
+        Returns:
+            成功处理的数量
+        """
+        workers = min(max_workers, len(json_files))
+        out_dir = Path(self.download_dir)
+        out_dir.mkdir(parents=True, exist_ok=True)
+
+        # 轮流分片，使各进程的卡牌数量接近
+        shards = [[str(f) for f in json_files[i::workers]] for i in range(workers)]
+        worker_dirs = [str(out_dir / f"w{i}") for i in range(workers)]
+
+        logger.info("使用 %s 个浏览器进程并行处理 %s 张卡牌", workers, len(json_files))
+
+        # 所有工作进程共用一个 chromedriver，只各自新建浏览器会话
+        service = _start_shared_service()
+        service_url = service.service_url if service else None
+
+        success_count = 0
+        done = 0
+        try:
+            with _worker_log_queue() as log_queue, concurrent.futures.ProcessPoolExecutor(
+                max_workers=workers, initializer=_init_worker_logging, initargs=(log_queue, logger.getEffectiveLevel())
+            ) as pool:
+                futures = {
+                    pool.submit(_import_worker, shard, worker_dir, self.headless, service_url, self.fast_render): len(shard)
+                    for shard, worker_dir in zip(shards, worker_dirs)
+                }
+                for future in concurrent.futures.as_completed(futures):
+                    try:
+                        success_count += future.result()
+                    except Exception as e:
+                        logger.error("❌ 工作进程出错: %s", e)
+                    done += futures[future]
+                    if progress_cb:
+                        progress_cb(done)
+        finally:
+            if service:
+                service.stop()
+
+        # 汇总各进程下载的图片
+        for worker_dir in worker_dirs:
+            try:
+                with os.scandir(worker_dir) as it:
+                    for entry in it:
+                        if entry.is_file():
+                            os.replace(entry.path, out_dir / entry.name)
+                os.rmdir(worker_dir)
+            except OSError as e:
+                logger.warning("⚠️ 汇总 %s 失败: %s", worker_dir, e)
 
         return success_count
 
@@ -642,8 +1187,91 @@ return 'no-drop';
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         """上下文管理器退出"""
-        if self.driver:
-            self.driver.quit()
+        self._quit_driver()
+
+
+def _find_art_bounds(root) -> Optional[dict]:
+    """用显式栈按文档顺序查找第一个带 bounds 的 Art 图片节点"""
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        if not isinstance(node, dict):
+            continue
+        if node.get('type') == 'image' and node.get('name') == 'Art':
+            bounds = node.get('bounds')
+            if bounds:
+                return bounds
+        children = node.get('children')
+        if children:
+            stack.extend(reversed(children))
+    return None
+
+
+def _overlay_one(base_path: str, art_path: str, bounds: Optional[dict], target: str, margin_ratio: float) -> bool:
+    """叠加进程入口：有 bounds 时按 bounds 定位，否则居中叠加（不启动浏览器）"""
+    automation = CardConjurerAutomation()
+    if bounds:
+        return automation.overlay_art_on_card_with_bounds(base_path, art_path, bounds, target)
+    return automation.overlay_art_on_card(base_path, art_path, target, margin_ratio=margin_ratio)
+
+
+def _start_shared_service() -> Optional[Service]:
+    """
+    启动一个供所有工作进程共用的 chromedriver
+
+    Returns:
+        已启动的 Service；PATH 中没有 chromedriver 或启动失败时返回 None（各进程自行启动）
+    """
+    path = shutil.which("chromedriver")
+    if not path:
+        return None
+    service = Service(executable_path=path, port=0)
+    try:
+        service.start()
+    except WebDriverException as e:
+        logger.warning("⚠️ 启动共享 chromedriver 失败，改为各进程独立启动: %s", e)
+        return None
+    return service
+
+
+@contextlib.contextmanager
+def _worker_log_queue():
+    """
+    工作进程的日志经队列交给本进程的单个监听线程写出，各进程不再争抢控制台
+
+    Yields:
+        传给 _init_worker_logging 的日志队列
+    """
+    with multiprocessing.Manager() as manager:
+        log_queue = manager.Queue()
+        handlers = logging.getLogger().handlers or [logging.StreamHandler()]
+        listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        listener.start()
+        try:
+            yield log_queue
+        finally:
+            listener.stop()
+
+
+def _init_worker_logging(log_queue, level: int):
+    """工作进程初始化：本模块日志只写入队列，由主进程统一输出（沿用主进程的日志级别）"""
+    logger.handlers[:] = [logging.handlers.QueueHandler(log_queue)]
+    logger.setLevel(level)
+    logger.propagate = False
+
+
+def _import_worker(
+    json_files: List[str],
+    download_dir: str,
+    headless: bool,
+    service_url: Optional[str] = None,
+    fast_render: bool = False,
+) -> int:
+    """工作进程入口：使用独立的浏览器串行处理一个分片"""
+    automation = CardConjurerAutomation(
+        headless=headless, download_dir=download_dir, service_url=service_url, fast_render=fast_render
+    )
+    return automation.batch_import_and_download(json_files)
 
 
 def main():
@@ -653,11 +1281,18 @@ def main():
     parser = argparse.ArgumentParser(description='CardConjurer自动化工具')
     parser.add_argument('json_dir', help='JSON文件目录')
     parser.add_argument('-o', '--output', default='downloaded_images', help='输出目录')
-    parser.add_argument('--headless', action='store_true', help='无头模式运行')
+    parser.add_argument('--headless', dest='headless', action='store_true', default=True, help='无头模式运行（默认）')
+    parser.add_argument('--show-browser', dest='headless', action='store_false', help='显示浏览器窗口运行')
+    parser.add_argument('-w', '--workers', type=int, default=1, help='并行的浏览器进程数（默认: 1）')
+    parser.add_argument('--fast-render', action='store_true',
+                        help='实验性：直接调用页面 loadCard 并导出画布，失败时回退到上传+下载')
     parser.add_argument('--overlay-dir', default=None, help='本地生成图片目录，用于覆盖下载的卡牌图（按文件名stem匹配）')
 
     args = parser.parse_args()
 
+    # 逐卡日志（处理/下载结果）默认输出，设置 LOGLEVEL=WARNING 只看失败信息
+    logging.basicConfig(level=os.environ.get("LOGLEVEL", "INFO").upper(), format="%(message)s")
+
     # 获取所有JSON文件
     json_files = list(Path(args.json_dir).glob("*.json"))
 
@@ -668,8 +1303,8 @@ def main():
     print(f"找到 {len(json_files)} 个JSON文件")
 
     # 批量处理
-    automation = CardConjurerAutomation(headless=args.headless, download_dir=args.output)
-    success_count = automation.batch_import_and_download(json_files)
+    automation = CardConjurerAutomation(headless=args.headless, download_dir=args.output, fast_render=args.fast_render)
+    success_count = automation.batch_import_and_download(json_files, max_workers=args.workers)
 
     print(f"\n🎉 完成！成功处理 {success_count}/{len(json_files)} 张卡牌")
 
@@ -683,4 +1318,6 @@ def main():
 
 
 if __name__ == '__main__':
+    # 打包为单文件可执行程序时，spawn 出的子进程需要在此处接管，否则会重新启动整个程序
+    multiprocessing.freeze_support()
     main()
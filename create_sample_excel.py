@@ -4,7 +4,7 @@
 创建示例Excel文件
 """
 
-import pandas as pd
+from openpyxl import Workbook
 
 # 示例卡牌数据
 sample_data = [
@@ -46,10 +46,15 @@ sample_data = [
     }
 ]
 
-# 创建DataFrame
-df = pd.DataFrame(sample_data)
+# 直接用 openpyxl 逐行写出（只写模式，内存占用不随行数增长），无需导入 pandas
+wb = Workbook(write_only=True)
+ws = wb.create_sheet('Sheet1')
+headers = list(sample_data[0].keys())
+ws.append(headers)
+for row in sample_data:
+    ws.append([row[h] for h in headers])
 
 # 保存为Excel文件
-df.to_excel('sample_cards.xlsx', index=False, engine='openpyxl')
+wb.save('sample_cards.xlsx')
 
 print("✅ 示例Excel文件已创建: sample_cards.xlsx")
@@ -6,18 +6,54 @@ CardGener GUI应用
 """
 
 import tkinter as tk
-from tkinter import ttk, filedialog, messagebox, scrolledtext
+from tkinter import ttk, messagebox, scrolledtext
 import os
 import sys
+import queue
+import functools
+import multiprocessing
 import threading
 from pathlib import Path
 import json
-import shutil
+
+# 图片拼接时识别的图片扩展名（小写）
+IMAGE_EXTS = ('.png', '.jpg', '.jpeg', '.bmp', '.gif')
+
+
+@functools.lru_cache(maxsize=1)
+def _find_chromedriver():
+    """在 PATH 中查找 chromedriver（结果缓存，菜单“重新检测依赖”时清除）"""
+    import shutil
+    return shutil.which('chromedriver')
+
+
+@functools.lru_cache(maxsize=1)
+def _has_selenium():
+    """检查 selenium 是否已安装，只查找模块而不真正导入"""
+    import importlib.util
+    return importlib.util.find_spec("selenium") is not None
 
 
 class CardGeneratorGUI:
     """卡牌生成器GUI主类"""
 
+    # 同一 Tk 根窗口上的多个界面共用一个已配置好的 Style
+    _style = None
+
+    # 每个日志控件最多保留的行数，超出时删除最早的行
+    LOG_MAX_LINES = 5000
+
+    @classmethod
+    def _get_style(cls, root):
+        """返回绑定到 root 的 ttk.Style，首次创建时设置主题和 Accent.TButton 样式"""
+        if cls._style is None or cls._style.master is not root:
+            style = ttk.Style(root)
+            style.theme_use('clam')
+            style.configure("Accent.TButton", font=("TkDefaultFont", 10, "bold"), padding=6)
+            style.map("Accent.TButton", background=[("active", "#3B82F6")])
+            cls._style = style
+        return cls._style
+
     def __init__(self, root):
         """初始化GUI"""
         self.root = root
@@ -25,11 +61,16 @@ class CardGeneratorGUI:
         self.root.geometry("900x700")
 
         # 设置样式
-        self.style = ttk.Style()
-        self.style.theme_use('clam')
+        self.style = self._get_style(self.root)
+
+        # 后台线程的日志先放入队列，由主线程定时批量写入日志控件
+        self._log_queue = queue.Queue()
 
         # 创建主界面
         self.create_widgets()
+        # 队列中以这些键代替日志控件的条目是进度值，写入对应的进度条变量
+        self._progress_vars = {'progress_import': self.import_progress_var}
+        self.root.after(50, self._drain_logs)
 
         # 设置持久化文件路径（存放到用户主目录隐藏文件）
         self.settings_path = Path.home() / ".cardgener_gui_settings.json"
@@ -56,6 +97,8 @@ class CardGeneratorGUI:
         settings_menu.add_command(label="加载设置", command=self.load_settings)
         settings_menu.add_separator()
         settings_menu.add_command(label="重置为默认", command=self._reset_settings_prompt)
+        settings_menu.add_separator()
+        settings_menu.add_command(label="重新检测依赖", command=self.rescan_dependencies)
         menubar.add_cascade(label="设置", menu=settings_menu)
         self.root.config(menu=menubar)
         # 创建笔记本（选项卡）
@@ -143,11 +186,16 @@ class CardGeneratorGUI:
         ttk.Button(frame, text="浏览...", command=self.browse_overlay_dir).grid(row=2, column=2, pady=5)
 
         # 无头模式
-        self.import_headless_var = tk.BooleanVar(value=False)
+        self.import_headless_var = tk.BooleanVar(value=True)
         self.import_apply_overlay_var = tk.BooleanVar(value=False)
-        ttk.Checkbutton(frame, text="无头模式运行（后台）", variable=self.import_headless_var).grid(
-            row=3, column=0, columnspan=3, sticky='w', pady=5
-        )
+        options_frame = ttk.Frame(frame)
+        options_frame.grid(row=3, column=0, columnspan=3, sticky='w', pady=5)
+        ttk.Checkbutton(options_frame, text="无头模式运行（后台）", variable=self.import_headless_var).pack(side=tk.LEFT)
+
+        # 并发数：大于1时分片交给多个独立的Chrome实例（强制无头）
+        ttk.Label(options_frame, text="并发数:").pack(side=tk.LEFT, padx=(20, 5))
+        self.import_workers_var = tk.IntVar(value=1)
+        ttk.Spinbox(options_frame, from_=1, to=8, textvariable=self.import_workers_var, width=6).pack(side=tk.LEFT)
         ttk.Checkbutton(frame, text="导入后按 JSON bounds 叠加本地艺术图", variable=self.import_apply_overlay_var).grid(
             row=4, column=0, columnspan=3, sticky='w', pady=5
         )
@@ -162,6 +210,11 @@ class CardGeneratorGUI:
         self.import_log = scrolledtext.ScrolledText(frame, height=15, width=70)
         self.import_log.grid(row=7, column=0, columnspan=3, pady=5)
 
+        # 进度条（由 batch_import_and_download 的进度回调经日志队列驱动）
+        self.import_progress_var = tk.IntVar(value=0)
+        self.import_progress = ttk.Progressbar(frame, mode='determinate', variable=self.import_progress_var)
+        self.import_progress.grid(row=8, column=0, columnspan=3, sticky='ew', pady=5)
+
     def create_stitch_tab(self):
         """创建图片拼接选项卡"""
         frame = ttk.LabelFrame(self.tab_stitch, text="图片拼接", padding=20)
@@ -293,62 +346,48 @@ class CardGeneratorGUI:
         self.ai_log = scrolledtext.ScrolledText(frame, height=15, width=70)
         self.ai_log.grid(row=11, column=0, columnspan=3, pady=5)
 
-    # 浏览按钮回调函数
-    def browse_input_file(self):
-        filename = filedialog.askopenfilename(
-            title="选择Excel/CSV文件",
-            filetypes=[("Excel/CSV", "*.xlsx *.xls *.csv"), ("所有文件", "*.*")]
-        )
+    # 浏览按钮回调函数（文件对话框模块只在第一次点击“浏览...”时导入）
+    def _browse_file(self, var, title, filetypes):
+        from tkinter import filedialog
+        filename = filedialog.askopenfilename(title=title, filetypes=filetypes)
         if filename:
-            self.basic_input_var.set(filename)
+            var.set(filename)
 
-    def browse_output_dir(self):
-        dirname = filedialog.askdirectory(title="选择输出目录")
+    def _browse_dir(self, var, title):
+        from tkinter import filedialog
+        dirname = filedialog.askdirectory(title=title)
         if dirname:
-            self.basic_output_var.set(dirname)
+            var.set(dirname)
+
+    def browse_input_file(self):
+        self._browse_file(self.basic_input_var, "选择Excel/CSV文件", [("Excel/CSV", "*.xlsx *.xls *.csv"), ("所有文件", "*.*")])
+
+    def browse_output_dir(self):
+        self._browse_dir(self.basic_output_var, "选择输出目录")
 
     def browse_template_file(self):
-        filename = filedialog.askopenfilename(
-            title="选择模板文件",
-            filetypes=[("JSON", "*.json"), ("所有文件", "*.*")]
-        )
-        if filename:
-            self.basic_template_var.set(filename)
+        self._browse_file(self.basic_template_var, "选择模板文件", [("JSON", "*.json"), ("所有文件", "*.*")])
 
     def browse_json_dir(self):
-        dirname = filedialog.askdirectory(title="选择JSON目录")
-        if dirname:
-            self.import_json_dir_var.set(dirname)
+        self._browse_dir(self.import_json_dir_var, "选择JSON目录")
 
     def browse_download_dir(self):
-        dirname = filedialog.askdirectory(title="选择下载目录")
-        if dirname:
-            self.import_download_var.set(dirname)
+        self._browse_dir(self.import_download_var, "选择下载目录")
 
     def browse_overlay_dir(self):
-        dirname = filedialog.askdirectory(title="选择本地生成艺术图目录")
-        if dirname:
-            self.import_overlay_dir_var.set(dirname)
+        self._browse_dir(self.import_overlay_dir_var, "选择本地生成艺术图目录")
 
     def browse_stitch_input(self):
-        dirname = filedialog.askdirectory(title="选择图片目录")
-        if dirname:
-            self.stitch_input_var.set(dirname)
+        self._browse_dir(self.stitch_input_var, "选择图片目录")
 
     def browse_stitch_output(self):
-        dirname = filedialog.askdirectory(title="选择输出目录")
-        if dirname:
-            self.stitch_output_var.set(dirname)
+        self._browse_dir(self.stitch_output_var, "选择输出目录")
 
     def browse_ai_json_dir(self):
-        dirname = filedialog.askdirectory(title="选择JSON目录")
-        if dirname:
-            self.ai_json_dir_var.set(dirname)
+        self._browse_dir(self.ai_json_dir_var, "选择JSON目录")
 
     def browse_ai_output(self):
-        dirname = filedialog.askdirectory(title="选择输出目录")
-        if dirname:
-            self.ai_output_var.set(dirname)
+        self._browse_dir(self.ai_output_var, "选择输出目录")
 
     def toggle_api_key_visibility(self):
         """切换 AI Key 的可见性（掩码/明文）。"""
@@ -412,15 +451,17 @@ class CardGeneratorGUI:
         json_dir = self.import_json_dir_var.get()
         download_dir = self.import_download_var.get()
         headless = self.import_headless_var.get()
-
-        # 前置检查: 确保 selenium 可用并提示 chromedriver
         try:
-            import selenium  # type: ignore
+            workers = max(1, int(self.import_workers_var.get()))
         except Exception:
+            workers = 1
+
+        # 前置检查: 确保 selenium 可用并提示 chromedriver
+        if not _has_selenium():
             messagebox.showerror("错误", "未检测到 selenium 库。请运行: pip install selenium\n或参阅项目文档安装依赖。")
             return
 
-        if shutil.which('chromedriver') is None:
+        if _find_chromedriver() is None:
             proceed = messagebox.askyesno("提示", "未在 PATH 中找到 chromedriver，Selenium 可能无法启动。是否继续尝试？")
             if not proceed:
                 return
@@ -429,28 +470,46 @@ class CardGeneratorGUI:
             messagebox.showerror("错误", "请选择有效的JSON目录")
             return
 
-        # 收集所有 json 文件
-        json_paths = list(Path(json_dir).glob("*.json"))
-        if not json_paths:
+        # 收集所有 json 文件（batch_import_and_download 接受路径列表）
+        with os.scandir(json_dir) as it:
+            files = [e.path for e in it if e.is_file() and e.name.endswith(".json")]
+        if not files:
             messagebox.showerror("错误", f"未在目录中找到JSON文件: {json_dir}")
             return
 
         self.is_processing = True
         self.status_bar.config(text="正在导入CardConjurer...")
         self.import_log.delete(1.0, tk.END)
+        self.import_progress.config(maximum=len(files))
+        self.import_progress_var.set(0)
+
+        # 进度最多上报约100次，避免每张卡牌都触发一次重绘
+        total = len(files)
+        step = max(1, total // 100)
+
+        def progress_cb(done):
+            if done % step == 0 or done >= total:
+                self._log_queue.put(('progress_import', done))
 
         def task():
             try:
                 from cardconjurer_automation import CardConjurerAutomation
 
-                self.log_message(self.import_log, f"开始导入 {len(json_paths)} 个JSON 到 CardConjurer\n")
+                self.log_message(self.import_log, f"开始导入 {len(files)} 个JSON 到 CardConjurer\n")
                 self.log_message(self.import_log, f"下载目录: {download_dir}\n")
-                self.log_message(self.import_log, f"无头模式: {headless}\n")
+                workers_used = min(workers, len(files))
+                if workers_used > 1:
+                    # 多个浏览器同时弹窗既看不过来也互相抢焦点，并行时一律无头
+                    headless_used = True
+                    self.log_message(self.import_log, f"并发数: {workers_used}（并行时强制无头模式）\n")
+                else:
+                    headless_used = headless
+                    self.log_message(self.import_log, f"无头模式: {headless}\n")
 
-                automation = CardConjurerAutomation(headless=headless, download_dir=download_dir)
-                # batch_import_and_download 接受路径列表
-                files = [str(p) for p in json_paths]
-                success_count = automation.batch_import_and_download(files)
+                automation = CardConjurerAutomation(headless=headless_used, download_dir=download_dir)
+                success_count = automation.batch_import_and_download(
+                    files, max_workers=workers_used, progress_cb=progress_cb
+                )
 
                 self.log_message(self.import_log, f"\n✅ 完成: 成功处理 {success_count}/{len(files)} 张卡牌\n")
                 self.status_bar.config(text="导入完成")
@@ -517,12 +576,11 @@ class CardGeneratorGUI:
 
                 if self.stitch_tts_var.get():
                     # TTS模式：使用输出目录（默认或用户指定）
-                    image_extensions = {'.png', '.jpg', '.jpeg', '.bmp', '.gif'}
-                    image_paths = [
-                        str(p) for p in Path(input_dir).iterdir()
-                        if p.suffix.lower() in image_extensions
-                    ]
-                    image_paths.sort()
+                    with os.scandir(input_dir) as it:
+                        image_paths = sorted(
+                            e.path for e in it
+                            if e.is_file() and e.name.lower().endswith(IMAGE_EXTS)
+                        )
 
                     preset = self.stitch_preset_var.get() or None
                     target_w = None
@@ -657,10 +715,35 @@ class CardGeneratorGUI:
         threading.Thread(target=task, daemon=True).start()
 
     def log_message(self, log_widget, message):
-        """添加日志消息"""
-        log_widget.insert(tk.END, message)
-        log_widget.see(tk.END)
-        log_widget.update()
+        """添加日志消息（可在任意线程调用，实际写入由主线程的 _drain_logs 完成）"""
+        self._log_queue.put((log_widget, message))
+
+    def _drain_logs(self):
+        """取出队列中所有待写日志，每个控件只插入和滚动一次，然后重新排期"""
+        batches = {}
+        progress = {}
+        try:
+            while True:
+                log_widget, message = self._log_queue.get_nowait()
+                if log_widget in self._progress_vars:
+                    # 进度条目只保留最新值
+                    progress[log_widget] = message
+                else:
+                    batches.setdefault(log_widget, []).append(message)
+        except queue.Empty:
+            pass
+
+        for key, value in progress.items():
+            self._progress_vars[key].set(value)
+
+        for log_widget, messages in batches.items():
+            log_widget.insert(tk.END, "".join(messages))
+            line_count = int(log_widget.index('end-1c').split('.')[0])
+            if line_count > self.LOG_MAX_LINES:
+                log_widget.delete('1.0', f'{line_count - self.LOG_MAX_LINES + 1}.0')
+            log_widget.see(tk.END)
+
+        self.root.after(50, self._drain_logs)
 
     def get_settings_dict(self):
         """收集当前界面设置为字典"""
@@ -672,6 +755,7 @@ class CardGeneratorGUI:
             "import_json_dir": self.import_json_dir_var.get(),
             "import_download_dir": self.import_download_var.get(),
             "import_headless": bool(self.import_headless_var.get()),
+            "import_workers": int(self.import_workers_var.get()),
             "import_overlay_dir": self.import_overlay_dir_var.get(),
             "import_apply_overlay": bool(self.import_apply_overlay_var.get()),
             "stitch_input": self.stitch_input_var.get(),
@@ -716,6 +800,11 @@ class CardGeneratorGUI:
                 self.import_download_var.set(data.get("import_download_dir") or "downloaded_images")
             if "import_headless" in data:
                 self.import_headless_var.set(bool(data.get("import_headless")))
+            if "import_workers" in data:
+                try:
+                    self.import_workers_var.set(int(data.get("import_workers")))
+                except Exception:
+                    pass
             if "import_overlay_dir" in data:
                 try:
                     self.import_overlay_dir_var.set(data.get("import_overlay_dir") or "")
@@ -821,6 +910,18 @@ class CardGeneratorGUI:
         except Exception as e:
             messagebox.showerror("错误", f"加载设置失败: {str(e)}")
 
+    def rescan_dependencies(self):
+        """清除依赖检测缓存并重新检测 selenium / chromedriver"""
+        _has_selenium.cache_clear()
+        _find_chromedriver.cache_clear()
+        selenium_ok = _has_selenium()
+        chromedriver = _find_chromedriver()
+        messagebox.showinfo(
+            "依赖检测",
+            f"selenium: {'已安装' if selenium_ok else '未安装'}\n"
+            f"chromedriver: {chromedriver or '未在 PATH 中找到'}",
+        )
+
     def _reset_settings_prompt(self):
         if messagebox.askyesno("重置", "是否重置为默认设置（不会删除已保存文件）？"):
             # 通过应用空字典还原到默认控件初始值
@@ -854,4 +955,6 @@ def main():
 
 
 if __name__ == '__main__':
+    # 打包为单文件可执行程序时，spawn 出的子进程需要在此处接管，否则会重新启动整个程序
+    multiprocessing.freeze_support()
     main()
@@ -10,6 +10,15 @@ from pathlib import Path
 from typing import List, Tuple, Optional
 from PIL import Image
 
+# 识别的图片扩展名（小写）
+IMAGE_EXTS = ('.png', '.jpg', '.jpeg', '.bmp', '.gif')
+
+
+def _list_images(image_dir: str) -> List[str]:
+    """按文件名排序列出目录中的图片文件"""
+    with os.scandir(image_dir) as it:
+        return sorted(e.path for e in it if e.is_file() and e.name.lower().endswith(IMAGE_EXTS))
+
 
 class ImageStitcher:
     """图片拼接器类"""
@@ -169,20 +178,13 @@ class ImageStitcher:
         Returns:
             是否成功拼接
         """
-        # 获取所有图片文件
-        image_extensions = {'.png', '.jpg', '.jpeg', '.bmp', '.gif'}
-        image_paths = [
-            str(p) for p in Path(image_dir).iterdir()
-            if p.suffix.lower() in image_extensions
-        ]
+        # 获取所有图片文件（排序确保顺序一致）
+        image_paths = _list_images(image_dir)
 
         if not image_paths:
             print(f"❌ 未找到图片文件: {image_dir}")
             return False
 
-        # 排序确保顺序一致
-        image_paths.sort()
-
         total = len(image_paths)
 
         # 如果 output_path 指定为目录或以分隔符结尾，则作为输出目录
@@ -308,12 +310,7 @@ def main():
 
     if args.tts:
         # TTS模式
-        image_extensions = {'.png', '.jpg', '.jpeg', '.bmp', '.gif'}
-        image_paths = [
-            str(p) for p in Path(args.input_dir).iterdir()
-            if p.suffix.lower() in image_extensions
-        ]
-        image_paths.sort()
+        image_paths = _list_images(args.input_dir)
 
         output_dir = Path(args.output).parent / 'tts_decks'
         sheets = stitcher.create_tabletop_simulator_deck(
@@ -330,12 +327,7 @@ def main():
         # 普通拼接模式
         if args.rows:
             # 手动指定行列数
-            image_extensions = {'.png', '.jpg', '.jpeg', '.bmp', '.gif'}
-            image_paths = [
-                str(p) for p in Path(args.input_dir).iterdir()
-                if p.suffix.lower() in image_extensions
-            ]
-            image_paths.sort()
+            image_paths = _list_images(args.input_dir)
             stitcher.stitch_images(
                 image_paths,
                 args.rows,
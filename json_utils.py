@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+卡牌文件写出工具
+卡牌JSON统一以 UTF-8、2 空格缩进写出，是否安装 orjson 得到的文件格式一致；
+JSON 与卡图使用同一个文件名清理函数，同一卡牌名在各模块中得到相同的文件名
+"""
+
+import json
+import re
+
+try:
+    import orjson
+except ImportError:  # orjson 为可选依赖，缺失时回退到标准库 json
+    orjson = None
+
+# 文件名中保留字母数字（含中文等 Unicode 字符）、空格、- 和 _
+_SANITIZE = re.compile(r'[^\w \-]')
+
+
+def sanitize_filename(name: str) -> str:
+    """清理文件名中的非法字符，去掉首尾空白后把空格替换为下划线"""
+    return _SANITIZE.sub('', name).strip().replace(' ', '_')
+
+
+def write_json(path, data) -> None:
+    """写出JSON文件（优先使用 orjson 一次写入整个缓冲区；orjson 只支持 2 空格缩进，标准库路径与之保持一致）"""
+    if orjson is not None:
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY))
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
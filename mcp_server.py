@@ -17,6 +17,8 @@ from typing import Any, Dict, List, Optional, Sequence, Union
 import csv
 from datetime import datetime
 
+from json_utils import sanitize_filename, write_json
+
 # MCP SDK imports
 try:
     from mcp.server import Server
@@ -106,35 +108,40 @@ class CardGeneratorMCPServer:
         except Exception as e:
             raise Exception(f"Failed to load template from {path}: {e}")
 
+    @staticmethod
+    def _iter_nodes(data: Dict[str, Any]):
+        """Iterate card nodes depth-first in document order using an explicit stack"""
+        stack = [data]
+        while stack:
+            node = stack.pop()
+            if not isinstance(node, dict):
+                continue
+            yield node
+            children = node.get('children')
+            if children:
+                stack.extend(reversed(children))
+
     def update_field(self, data: Dict[str, Any], field_type: str,
                     field_name: str, value: str) -> bool:
-        """Recursively update a field in the card data structure"""
-        if data.get('type') == field_type and data.get('name') == field_name:
-            if field_type == 'text':
-                data['text'] = value
-            elif field_type == 'image':
-                data['src'] = value
-            return True
-
-        if 'children' in data:
-            for child in data['children']:
-                if self.update_field(child, field_type, field_name, value):
-                    return True
+        """Update the first matching field in the card data structure"""
+        for node in self._iter_nodes(data):
+            if node.get('type') == field_type and node.get('name') == field_name:
+                if field_type == 'text':
+                    node['text'] = value
+                elif field_type == 'image':
+                    node['src'] = value
+                return True
         return False
 
     def update_class_frame(self, data: Dict[str, Any], class_type: str) -> bool:
         """Update the class frame image in card data"""
-        if data.get('type') == 'image' and 'Class' in data.get('name', ''):
-            class_lower = class_type.lower()
-            data['src'] = f"fab/frame/classes/{class_lower}.png"
-            data['thumb'] = f"fab/frame/classes/thumb-{class_lower}.png"
-            data['name'] = f"{class_type.title()} Class"
-            return True
-
-        if 'children' in data:
-            for child in data['children']:
-                if self.update_class_frame(child, class_type):
-                    return True
+        for node in self._iter_nodes(data):
+            if node.get('type') == 'image' and 'Class' in node.get('name', ''):
+                class_lower = class_type.lower()
+                node['src'] = f"fab/frame/classes/{class_lower}.png"
+                node['thumb'] = f"fab/frame/classes/thumb-{class_lower}.png"
+                node['name'] = f"{class_type.title()} Class"
+                return True
         return False
 
     def generate_single_card(self, card_params: Dict[str, Any],
@@ -205,13 +212,11 @@ class CardGeneratorMCPServer:
         output_dir.mkdir(parents=True, exist_ok=True)
 
         # Sanitize filename
-        safe_name = "".join(c for c in card_name if c.isalnum() or c in (' ', '-', '_')).strip()
-        safe_name = safe_name.replace(' ', '_')
+        safe_name = sanitize_filename(card_name)
 
         # Save file
         output_file = output_dir / f"{safe_name}.json"
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(card_data, f, indent=4, ensure_ascii=False)
+        write_json(output_file, card_data)
 
         return str(output_file)
 
@@ -234,33 +239,27 @@ class CardGeneratorMCPServer:
         }
 
         def extract_field(data: Dict[str, Any], field_type: str, field_name: str) -> str:
-            """Recursively extract a field value"""
-            if data.get('type') == field_type and data.get('name') == field_name:
-                if field_type == 'text':
-                    return data.get('text', '')
-                elif field_type == 'image':
-                    return data.get('src', '')
-
-            if 'children' in data:
-                for child in data['children']:
-                    value = extract_field(child, field_type, field_name)
+            """Extract the first non-empty value of a field"""
+            for node in self._iter_nodes(data):
+                if node.get('type') == field_type and node.get('name') == field_name:
+                    if field_type == 'text':
+                        value = node.get('text', '')
+                    elif field_type == 'image':
+                        value = node.get('src', '')
+                    else:
+                        value = None
                     if value:
                         return value
             return ''
 
         def extract_class_type(data: Dict[str, Any]) -> str:
             """Extract class type from image name"""
-            if data.get('type') == 'image' and 'Class' in data.get('name', ''):
-                name = data.get('name', '')
-                # Extract class name from "Ninja Class" format
-                class_name = name.replace(' Class', '').strip().lower()
-                return class_name
-
-            if 'children' in data:
-                for child in data['children']:
-                    value = extract_class_type(child)
-                    if value:
-                        return value
+            for node in self._iter_nodes(data):
+                if node.get('type') == 'image' and 'Class' in node.get('name', ''):
+                    # Extract class name from "Ninja Class" format
+                    class_name = node.get('name', '').replace(' Class', '').strip().lower()
+                    if class_name:
+                        return class_name
             return ''
 
         # Extract fields from card data
@@ -1252,11 +1251,10 @@ class CardGeneratorMCPServer:
                             # Auto-generate prompt from card data
                             prompt = generator.generate_card_art_prompt(card_data)
 
-                        safe_name = "".join(c for c in card_name if c.isalnum() or c in (' ', '-', '_')).strip()
-                        safe_name = safe_name.replace(' ', '_')
+                        safe_name = sanitize_filename(card_name)
                         output_path = os.path.join(output_dir, f"{safe_name}.png")
 
-                        print(f"🎨 Generating art for: {card_name}", file=sys.stderr)
+                        logger.info("🎨 Generating art for: %s", card_name)
 
                         error_detail = None
                         try:
@@ -1472,7 +1470,7 @@ class CardGeneratorMCPServer:
                     }
 
                     # Step 1: Generate card JSONs
-                    print("📝 Step 1: Generating card JSONs...", file=sys.stderr)
+                    logger.info("📝 Step 1: Generating card JSONs...")
                     json_dir = os.path.join(output_base_dir, "card_jsons")
                     os.makedirs(json_dir, exist_ok=True)
 
@@ -1496,7 +1494,7 @@ class CardGeneratorMCPServer:
                     # Step 2: Generate AI artwork (optional)
                     art_dir = None
                     if generate_artwork:
-                        print("🎨 Step 2: Generating AI artwork...", file=sys.stderr)
+                        logger.info("🎨 Step 2: Generating AI artwork...")
                         from ai_image_generator import AIImageGenerator
 
                         art_dir = os.path.join(output_base_dir, "generated_art")
@@ -1507,7 +1505,7 @@ class CardGeneratorMCPServer:
 
                         for idx, card_data in enumerate(cards_data):
                             card_name = card_data.get('card_name', f'card_{idx}')
-                            safe_name = "".join(c for c in card_name if c.isalnum() or c in (' ', '-', '_')).strip().replace(' ', '_')
+                            safe_name = sanitize_filename(card_name)
                             output_path = os.path.join(art_dir, f"{safe_name}.png")
 
                             try:
@@ -1535,7 +1533,7 @@ class CardGeneratorMCPServer:
                     # Step 3: Render cards to images (optional)
                     rendered_dir = None
                     if render_images:
-                        print("🖼️ Step 3: Rendering cards to images...", file=sys.stderr)
+                        logger.info("🖼️ Step 3: Rendering cards to images...")
                         from cardconjurer_automation import CardConjurerAutomation
 
                         rendered_dir = os.path.join(output_base_dir, "rendered_cards")
@@ -1563,7 +1561,7 @@ class CardGeneratorMCPServer:
 
                     # Step 4: Stitch images (optional)
                     if stitch_images and rendered_dir:
-                        print("📐 Step 4: Stitching images...", file=sys.stderr)
+                        logger.info("📐 Step 4: Stitching images...")
                         from image_stitcher import ImageStitcher
 
                         stitcher = ImageStitcher()
@@ -8,6 +8,7 @@
 import json
 import csv
 from pathlib import Path
+from json_utils import sanitize_filename, write_json
 
 
 def load_template(template_path="template.json"):
@@ -16,34 +17,37 @@ def load_template(template_path="template.json"):
         return json.load(f)
 
 
+def iter_nodes(data):
+    """用显式栈按文档顺序深度优先遍历节点"""
+    stack = [data]
+    while stack:
+        node = stack.pop()
+        yield node
+        children = node.get('children')
+        if children:
+            stack.extend(reversed(children))
+
+
 def update_field(data, field_type, field_name, value):
-    """递归更新字段"""
-    if data.get('type') == field_type and data.get('name') == field_name:
-        if field_type == 'text':
-            data['text'] = value
-        elif field_type == 'image':
-            data['src'] = value
-        return True
-
-    if 'children' in data:
-        for child in data['children']:
-            if update_field(child, field_type, field_name, value):
-                return True
+    """更新第一个匹配的字段"""
+    for node in iter_nodes(data):
+        if node.get('type') == field_type and node.get('name') == field_name:
+            if field_type == 'text':
+                node['text'] = value
+            elif field_type == 'image':
+                node['src'] = value
+            return True
     return False
 
 
 def update_class_frame(data, class_type):
     """更新职业框架"""
-    if data.get('type') == 'image' and 'Class' in data.get('name', ''):
-        data['src'] = f"fab/frame/classes/{class_type.lower()}.png"
-        data['thumb'] = f"fab/frame/classes/thumb-{class_type.lower()}.png"
-        data['name'] = f"{class_type.title()} Class"
-        return True
-
-    if 'children' in data:
-        for child in data['children']:
-            if update_class_frame(child, class_type):
-                return True
+    for node in iter_nodes(data):
+        if node.get('type') == 'image' and 'Class' in node.get('name', ''):
+            node['src'] = f"fab/frame/classes/{class_type.lower()}.png"
+            node['thumb'] = f"fab/frame/classes/thumb-{class_type.lower()}.png"
+            node['name'] = f"{class_type.title()} Class"
+            return True
     return False
 
 
@@ -120,13 +124,11 @@ def main():
 
                 # 生成文件名
                 card_name = row.get('card_name', f'card_{idx+1}')
-                safe_name = "".join(c for c in card_name if c.isalnum() or c in (' ', '-', '_')).strip()
-                safe_name = safe_name.replace(' ', '_')
+                safe_name = sanitize_filename(card_name)
 
                 # 保存文件
                 output_file = output_path / f"{safe_name}.json"
-                with open(output_file, 'w', encoding='utf-8') as out:
-                    json.dump(card, out, indent=4, ensure_ascii=False)
+                write_json(output_file, card)
 
                 success_count += 1
                 print(f"[OK] 已生成: {output_file}")
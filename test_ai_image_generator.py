@@ -0,0 +1,500 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AIImageGenerator Test Script
+Checks the image cache and the helpers used by the batch generators
+"""
+
+import base64
+import copy
+import io
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+import requests
+from urllib3.exceptions import MaxRetryError, NewConnectionError
+
+sys.path.insert(0, str(Path(__file__).parent))
+import ai_image_generator
+from ai_image_generator import AIImageGenerator
+
+TEMPLATE_PATH = Path(__file__).parent / 'template.json'
+
+
+@pytest.fixture
+def generator(tmp_path, monkeypatch):
+    """在临时目录中创建生成器，缓存目录不落在仓库里"""
+    monkeypatch.chdir(tmp_path)
+    with AIImageGenerator() as gen:
+        yield gen
+
+
+def _write(path, size, mtime):
+    with open(path, 'wb') as f:
+        f.write(b'\0' * size)
+    os.utime(path, (mtime, mtime))
+
+
+def test_prune_cache_evicts_oldest_first(generator):
+    """prune_cache removes the least recently used files (by mtime) until under the limit"""
+    cache_dir = generator.cache_dir
+    # 文件名顺序与时间顺序故意不同，确保按 mtime 而不是文件名淘汰
+    for name, mtime in (('c.png', 1000), ('a.png', 2000), ('d.png', 3000), ('b.png', 4000)):
+        _write(os.path.join(cache_dir, name), 100, mtime)
+    # 非缓存文件不计入也不删除
+    _write(os.path.join(cache_dir, 'partial.tmp'), 1000, 0)
+
+    assert generator.prune_cache(max_bytes=400) == 0
+
+    # 命中缓存会刷新 mtime，最旧的 c.png 变为最近使用
+    assert generator._cache_get(os.path.join(cache_dir, 'c.png'), 'out.png')
+
+    assert generator.prune_cache(max_bytes=250) == 2
+    assert sorted(n for n in os.listdir(cache_dir) if n.endswith('.png')) == ['b.png', 'c.png']
+    assert os.path.exists(os.path.join(cache_dir, 'partial.tmp'))
+
+
+def test_cache_get_miss(generator):
+    assert not generator._cache_get(os.path.join(generator.cache_dir, 'missing.png'), 'out.png')
+    assert not os.path.exists('out.png')
+
+
+def test_generate_and_save_uses_cache_unless_forced(generator, monkeypatch):
+    calls = []
+
+    def fake_stream(prompt, output_path, width, height, cache_path):
+        calls.append(prompt)
+        with open(output_path, 'wb') as f:
+            f.write(b'new')
+        generator._cache_put(cache_path, b'new')
+        return True
+
+    monkeypatch.setattr(generator, '_stream_pollinations', fake_stream)
+    cache_path = os.path.join(generator.cache_dir, generator._cache_key('a ninja', 64, 64) + '.png')
+    with open(cache_path, 'wb') as f:
+        f.write(b'old')
+
+    assert generator.generate_and_save('a ninja', 'cached.png', width=64, height=64)
+    assert calls == []
+    assert Path('cached.png').read_bytes() == b'old'
+
+    # --force 跳过缓存重新请求，并用新结果覆盖缓存
+    assert generator.generate_and_save('a ninja', 'forced.png', width=64, height=64, force=True)
+    assert calls == ['a ninja']
+    assert Path('forced.png').read_bytes() == b'new'
+    assert Path(cache_path).read_bytes() == b'new'
+
+
+def _load_template():
+    with open(TEMPLATE_PATH, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+# 原始实现：每个字段递归遍历整棵树，作为对照
+def _old_find_text_field(data, field_name):
+    if isinstance(data, dict):
+        if data.get('type') == 'text' and data.get('name') == field_name:
+            return data.get('text', '')
+        if 'children' in data:
+            for child in data['children']:
+                result = _old_find_text_field(child, field_name)
+                if result:
+                    return result
+    return ''
+
+
+def _old_update_image_field(data, art_path):
+    if isinstance(data, dict):
+        if data.get('type') == 'image' and data.get('name') == 'Art':
+            data['src'] = art_path
+            return True
+        if 'children' in data:
+            for child in data['children']:
+                if _old_update_image_field(child, art_path):
+                    return True
+    return False
+
+
+def test_extract_matches_recursive(generator):
+    """extract_card_data_from_json must read the same fields as the recursive search"""
+    card_json = _load_template()
+    card_data = generator.extract_card_data_from_json(card_json)
+
+    for key, field_name in (('card_name', 'Title'), ('card_type', 'Type'), ('rules_text', 'Rules')):
+        assert card_data[key] == _old_find_text_field(card_json['data'], field_name)
+
+
+def test_extract_skips_empty_duplicates(generator):
+    """Like the recursive search, an empty first match must not hide a later non-empty one"""
+    card_json = {'data': {'children': [
+        {'type': 'text', 'name': 'Title', 'text': ''},
+        {'type': 'group', 'children': [{'type': 'text', 'name': 'Title', 'text': 'Second'}]},
+    ]}}
+
+    card_data = generator.extract_card_data_from_json(card_json)
+    assert card_data['card_name'] == _old_find_text_field(card_json['data'], 'Title') == 'Second'
+
+
+def test_update_art_matches_recursive(generator):
+    """update_json_art_path must change the same node as the recursive update"""
+    template = _load_template()
+
+    expected = copy.deepcopy(template)
+    _old_update_image_field(expected['data'], 'art/new.png')
+
+    actual = copy.deepcopy(template)
+    changed = generator.update_json_art_path(actual, 'art/new.png')
+
+    assert actual == expected
+    assert changed == (template != expected)
+    # src 已是目标值时不算改动
+    assert generator.update_json_art_path(actual, 'art/new.png') is False
+
+
+def test_walk_handles_deep_trees(generator):
+    leaf = {'type': 'text', 'name': 'Title', 'text': 'Deep'}
+    root = leaf
+    for _ in range(sys.getrecursionlimit() * 2):
+        root = {'type': 'group', 'children': [root]}
+
+    assert generator.extract_card_data_from_json({'data': root})['card_name'] == 'Deep'
+
+
+@pytest.fixture
+def no_sleep(monkeypatch):
+    """重试退避不真正等待"""
+    monkeypatch.setattr(ai_image_generator.time, 'sleep', lambda seconds: None)
+
+
+def _connection_refused():
+    reason = NewConnectionError(None, 'Connection refused')
+    return requests.ConnectionError(MaxRetryError(None, '/generate', reason=reason))
+
+
+class _FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.ok = status_code < 400
+
+
+def _flaky(exc, calls):
+    def fn():
+        calls.append(1)
+        if len(calls) == 1:
+            raise exc
+        return _FakeResponse(200)
+    return fn
+
+
+def test_not_sent():
+    assert ai_image_generator._not_sent(requests.ConnectTimeout())
+    assert ai_image_generator._not_sent(_connection_refused())
+    assert not ai_image_generator._not_sent(requests.ReadTimeout())
+    assert not ai_image_generator._not_sent(requests.ConnectionError('Connection reset by peer'))
+
+
+def test_session_does_not_retry_post(generator):
+    retry = generator.session.get_adapter('https://example.com').max_retries
+    assert 'POST' not in retry.allowed_methods
+
+
+def test_non_idempotent_request_is_not_resent(generator, no_sleep):
+    calls = []
+    with pytest.raises(requests.ReadTimeout):
+        generator._call_with_retry(_flaky(requests.ReadTimeout(), calls), idempotent=False)
+    assert len(calls) == 1
+
+
+@pytest.mark.parametrize('make_exc', [requests.ConnectTimeout, _connection_refused])
+def test_non_idempotent_request_retries_before_send(generator, no_sleep, make_exc):
+    calls = []
+    response = generator._call_with_retry(_flaky(make_exc(), calls), idempotent=False)
+    assert response.status_code == 200
+    assert len(calls) == 2
+
+
+def test_idempotent_request_retries(generator, no_sleep):
+    calls = []
+    assert generator._call_with_retry(_flaky(requests.ReadTimeout(), calls)).status_code == 200
+    assert len(calls) == 2
+
+
+def _respond(status_code, calls):
+    def fn():
+        calls.append(status_code)
+        return _FakeResponse(status_code)
+    return fn
+
+
+@pytest.mark.parametrize('status_code', [429, 500, 503])
+def test_breaker_opens_after_consecutive_failures(generator, status_code):
+    calls = []
+    for _ in range(ai_image_generator._BREAKER_THRESHOLD):
+        assert generator._call_with_retry(_respond(status_code, calls)) is not None
+
+    # 熔断打开后不再发出请求
+    assert generator._call_with_retry(_respond(200, calls)) is None
+    assert len(calls) == ai_image_generator._BREAKER_THRESHOLD
+
+
+def test_breaker_ignores_client_errors(generator):
+    calls = []
+    for _ in range(ai_image_generator._BREAKER_THRESHOLD * 2):
+        generator._call_with_retry(_respond(404, calls))
+    assert generator._call_with_retry(_respond(200, calls)).status_code == 200
+
+
+def test_breaker_resets_on_success(generator):
+    calls = []
+    for _ in range(ai_image_generator._BREAKER_THRESHOLD - 1):
+        generator._call_with_retry(_respond(500, calls))
+    generator._call_with_retry(_respond(200, calls))
+    for _ in range(ai_image_generator._BREAKER_THRESHOLD - 1):
+        generator._call_with_retry(_respond(500, calls))
+    assert generator._call_with_retry(_respond(200, calls)).status_code == 200
+
+
+def test_breaker_counts_exhausted_retries(generator, no_sleep):
+    calls = []
+
+    def fail():
+        calls.append(1)
+        raise requests.ReadTimeout()
+
+    for _ in range(ai_image_generator._BREAKER_THRESHOLD):
+        with pytest.raises(requests.ReadTimeout):
+            generator._call_with_retry(fail, max_attempts=1)
+    assert generator._call_with_retry(fail) is None
+    assert len(calls) == ai_image_generator._BREAKER_THRESHOLD
+
+
+def _timed_acquires(bucket, n):
+    start = time.monotonic()
+    for _ in range(n):
+        bucket.acquire()
+    return time.monotonic() - start
+
+
+def test_token_bucket_unlimited():
+    assert _timed_acquires(ai_image_generator._TokenBucket(0), 1000) < 0.5
+
+
+def test_token_bucket_allows_burst_then_paces():
+    bucket = ai_image_generator._TokenBucket(rate=20, burst=3)
+    # 桶满时前 burst 个请求不等待
+    assert _timed_acquires(bucket, 3) < 0.1
+    # 之后按速率放行：再取 4 个约需 4 / 20 = 0.2 秒
+    elapsed = _timed_acquires(bucket, 4)
+    assert 0.17 <= elapsed < 0.6
+
+
+def test_token_bucket_configure_refills():
+    bucket = ai_image_generator._TokenBucket(rate=1, burst=1)
+    bucket.acquire()
+    bucket.configure(rate=1, burst=2)
+    assert _timed_acquires(bucket, 2) < 0.1
+
+
+
+def test_cache_key(generator):
+    """缓存键随 API 类型、模型、尺寸和提示词变化，跨实例稳定"""
+    key = generator._cache_key('a ninja', 1024, 1024)
+    assert len(key) == 64
+
+    with AIImageGenerator() as other:
+        assert other._cache_key('a ninja', 1024, 1024) == key
+
+    assert generator._cache_key('a ninja', 512, 1024) != key
+    assert generator._cache_key('a samurai', 1024, 1024) != key
+
+    generator.api_type = 'modelscope'
+    modelscope_key = generator._cache_key('a ninja', 1024, 1024)
+    assert modelscope_key != key
+
+    generator.api_model = 'Qwen/Qwen-Image'
+    assert generator._cache_key('a ninja', 1024, 1024) not in (key, modelscope_key)
+
+
+
+B64 = base64.b64encode(os.urandom(300)).decode('ascii')
+
+
+def test_looks_base64():
+    assert ai_image_generator._looks_base64(B64)
+    # MIME 风格的换行不影响判断
+    assert ai_image_generator._looks_base64(base64.encodebytes(os.urandom(300)).decode('ascii'))
+    # 太短、含非 base64 字符或非 ASCII 的都不是图片数据
+    assert not ai_image_generator._looks_base64(B64[:200])
+    assert not ai_image_generator._looks_base64('https://example.com/' + B64)
+    assert not ai_image_generator._looks_base64(B64 + '-')
+    assert not ai_image_generator._looks_base64(B64 + '图')
+
+
+
+B64_A = base64.b64encode(b'A' * 300).decode('ascii')
+B64_B = base64.b64encode(b'B' * 300).decode('ascii')
+B64_C = base64.b64encode(b'C' * 300).decode('ascii')
+
+# (文档, keys, 期望结果)
+BASE64_CASES = [
+    ({'images': [B64_A]}, None, B64_A),
+    ({'note': B64_A, 'image': B64_B}, None, B64_B),
+    ({'meta': B64_A, 'output': {'image': B64_B}}, None, B64_B),
+    ({'meta': B64_A, 'output': {'x': B64_B}}, None, B64_A),
+    ({'output': {'image': B64_B}, 'images': [B64_C]}, None, B64_B),
+    ({'url': 'https://example.com/a.png', 'seed': 1}, None, None),
+    ([{'b64_json': B64_C}], None, B64_C),
+    ({'data': [B64_A], 'outputs': {'output_images': [B64_B]}}, ('outputs', 'output', 'data', 'result'), B64_B),
+    ({'data': {'x': B64_A, 'image': B64_B}}, ('outputs', 'output', 'data', 'result'), B64_A),
+    ({'result': {'x': B64_C}, 'meta': B64_A}, ('outputs', 'output', 'data', 'result'), B64_C),
+    ({'meta': B64_A}, ('outputs', 'output', 'data', 'result'), None),
+    ([B64_A], ('outputs', 'output', 'data', 'result'), None),
+]
+
+BASE64_IDS = [f'case{i}' for i in range(len(BASE64_CASES))]
+
+
+class _FakeStreamResponse:
+    def __init__(self, doc):
+        self._body = json.dumps(doc).encode('utf-8')
+        self.raw = io.BytesIO(self._body)
+
+    def json(self):
+        return json.loads(self._body)
+
+
+def test_find_base64_prefers_image_fields():
+    for doc, keys, expected in BASE64_CASES:
+        if keys is None:
+            assert ai_image_generator._find_base64(doc) == expected, doc
+
+
+@pytest.mark.parametrize('doc, keys, expected', BASE64_CASES, ids=BASE64_IDS)
+def test_response_base64_without_ijson(monkeypatch, doc, keys, expected):
+    monkeypatch.setattr(ai_image_generator, 'ijson', None)
+    assert ai_image_generator._response_base64(_FakeStreamResponse(doc), keys=keys) == expected
+
+
+@pytest.mark.parametrize('doc, keys, expected', BASE64_CASES, ids=BASE64_IDS)
+def test_response_base64_with_ijson(doc, keys, expected):
+    """流式扫描与整体解析选出同一个字符串"""
+    if ai_image_generator.ijson is None:
+        pytest.skip('ijson not installed')
+    assert ai_image_generator._response_base64(_FakeStreamResponse(doc), keys=keys) == expected
+
+
+
+def _write_card_json(path, title, art_src=''):
+    card = {'data': {'children': [
+        {'type': 'text', 'name': 'Title', 'text': title},
+        {'type': 'image', 'name': 'Art', 'src': art_src},
+    ]}}
+    path.write_text(json.dumps(card), encoding='utf-8')
+
+
+@pytest.fixture
+def fake_generate(generator, monkeypatch):
+    """记录请求的输出路径并写出占位图片，不访问网络"""
+    generated = []
+
+    def generate_and_save(prompt, output_path, **kwargs):
+        generated.append(os.path.basename(output_path))
+        Path(output_path).write_bytes(b'png')
+        return True
+
+    monkeypatch.setattr(generator, 'generate_and_save', generate_and_save)
+    return generated
+
+
+def test_enhance_skips_only_exact_target(generator, fake_generate, tmp_path):
+    json_dir = tmp_path / 'json'
+    out_dir = tmp_path / 'art'
+    json_dir.mkdir()
+    out_dir.mkdir()
+    (out_dir / 'Done.png').write_bytes(b'png')
+    (out_dir / 'Elsewhere.png').write_bytes(b'png')
+
+    _write_card_json(json_dir / 'done.json', 'Done')
+    # JSON 文件名清理后与已有图片同名，但卡牌名不同：不能当作已完成
+    _write_card_json(json_dir / 'Done_copy.json', 'Other Card')
+    (out_dir / 'Done_copy.png').write_bytes(b'png')
+    # Art 已指向另一张现有图片：仍为本卡牌生成目标图片
+    _write_card_json(json_dir / 'linked.json', 'Linked', art_src=str(out_dir / 'Elsewhere.png'))
+
+    count = generator.enhance_existing_cards(str(json_dir), str(out_dir), delay=0, workers=2)
+
+    assert sorted(fake_generate) == ['Linked.png', 'Other_Card.png']
+    assert count == 2
+
+
+def test_enhance_force_regenerates(generator, fake_generate, tmp_path):
+    json_dir = tmp_path / 'json'
+    out_dir = tmp_path / 'art'
+    json_dir.mkdir()
+    out_dir.mkdir()
+    (out_dir / 'Done.png').write_bytes(b'png')
+    _write_card_json(json_dir / 'done.json', 'Done')
+
+    assert generator.enhance_existing_cards(str(json_dir), str(out_dir), delay=0, force=True, skip_if_exists=False) == 1
+    assert fake_generate == ['Done.png']
+
+
+
+def test_enhance_prefetch_window_is_bounded(generator, tmp_path, monkeypatch):
+    """请求阻塞时最多预读 2 * workers 张卡牌"""
+    json_dir = tmp_path / 'json'
+    json_dir.mkdir()
+    for i in range(20):
+        _write_card_json(json_dir / f'card{i:02d}.json', f'Card {i}')
+
+    release = threading.Event()
+    started = threading.Semaphore(0)
+    prepared = []
+    prepare_card = generator._prepare_card
+
+    def counting_prepare(json_file, *args):
+        prepared.append(json_file.name)
+        return prepare_card(json_file, *args)
+
+    def blocking_generate(prompt, output_path, **kwargs):
+        started.release()
+        release.wait(5)
+        return True
+
+    monkeypatch.setattr(generator, '_prepare_card', counting_prepare)
+    monkeypatch.setattr(generator, 'generate_and_save', blocking_generate)
+
+    result = []
+    runner = threading.Thread(target=lambda: result.append(generator.enhance_existing_cards(
+        str(json_dir), str(tmp_path / 'art'), delay=0, workers=2, update_json=False)))
+    runner.start()
+    try:
+        assert started.acquire(timeout=5) and started.acquire(timeout=5)
+        time.sleep(0.2)
+        assert len(prepared) == 4
+    finally:
+        release.set()
+        runner.join(10)
+
+    assert result == [20]
+    assert sorted(prepared) == sorted(p.name for p in json_dir.glob('*.json'))
+
+
+def test_enhance_logs_when_request_starts(generator, fake_generate, tmp_path, caplog):
+    json_dir = tmp_path / 'json'
+    json_dir.mkdir()
+    _write_card_json(json_dir / 'a.json', 'Alpha')
+
+    with caplog.at_level('INFO', logger=ai_image_generator.logger.name):
+        generator.enhance_existing_cards(str(json_dir), str(tmp_path / 'art'), delay=0, update_json=False)
+
+    assert '生成 Alpha...' in caplog.messages
+
+
+if __name__ == '__main__':
+    sys.exit(pytest.main([__file__, '-q']))
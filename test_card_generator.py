@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CardGenerator Test Script
+Checks that the precomputed field index produces the same cards as the
+original recursive update_* lookups on template.json
+"""
+
+import copy
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from card_generator import CardGenerator
+
+TEMPLATE_PATH = Path(__file__).parent / 'template.json'
+
+SAMPLE_ROWS = [
+    {
+        'card_name': 'Shadow Strike',
+        'card_type': 'Action - Attack',
+        'rules_text': 'Deal 5 damage to target hero. Go again.',
+        'cost': '2',
+        'power': '5',
+        'defense': '3',
+        'art_path': 'art/shadow_strike.png',
+        'class_type': 'ninja',
+        'artist': 'Test Artist',
+        'year': '2024'
+    },
+    {
+        'card_name': 'Iron Wall',
+        'card_type': 'Defense Reaction',
+        'rules_text': 'Prevent the next 3 damage.',
+        'cost': '1',
+        'defense': '4',
+        'class_type': 'guardian'
+    },
+    {
+        'card_name': 'Blank Slate',
+        'class_type': ''
+    },
+]
+
+
+# 原始实现：每个字段递归遍历整棵树，作为对照
+def _old_update_text_field(data, field_name, value):
+    if data.get('type') == 'text' and data.get('name') == field_name:
+        data['text'] = value
+        return True
+    if 'children' in data:
+        for child in data['children']:
+            if _old_update_text_field(child, field_name, value):
+                return True
+    return False
+
+
+def _old_update_image_field(data, field_name, value):
+    if data.get('type') == 'image' and data.get('name') == field_name:
+        data['src'] = value
+        return True
+    if 'children' in data:
+        for child in data['children']:
+            if _old_update_image_field(child, field_name, value):
+                return True
+    return False
+
+
+def _old_update_class_frame(data, class_type):
+    if data.get('type') == 'image' and 'Class' in data.get('name', ''):
+        data['src'] = f"fab/frame/classes/{class_type.lower()}.png"
+        data['thumb'] = f"fab/frame/classes/thumb-{class_type.lower()}.png"
+        data['name'] = f"{class_type.title()} Class"
+        return True
+    if 'children' in data:
+        for child in data['children']:
+            if _old_update_class_frame(child, class_type):
+                return True
+    return False
+
+
+def _old_generate_card(template, row):
+    card_data = json.loads(json.dumps(template))
+    root = card_data['data']
+
+    _old_update_text_field(root, 'Title', str(row.get('card_name', '')))
+    _old_update_text_field(root, 'Type', str(row.get('card_type', '')))
+    _old_update_text_field(root, 'Rules', str(row.get('rules_text', '')))
+    _old_update_text_field(root, 'Cost', str(row.get('cost', '')))
+    _old_update_text_field(root, 'Left Stat', str(row.get('power', '')))
+    _old_update_text_field(root, 'Right Stat', str(row.get('defense', '')))
+
+    artist = row.get('artist', 'Unknown Artist')
+    year = row.get('year', '2024')
+    _old_update_text_field(root, 'Collector Info', f"{artist} © {year} Legend Story Studios")
+
+    art_path = row.get('art_path', '')
+    if art_path:
+        _old_update_image_field(root, 'Art', art_path)
+
+    class_type = row.get('class_type', 'ninja')
+    if class_type:
+        _old_update_class_frame(root, class_type)
+
+    return card_data
+
+
+def test_generate_card_matches_recursive():
+    """generate_card must produce the same JSON as the recursive lookups"""
+    generator = CardGenerator(str(TEMPLATE_PATH))
+
+    for row in SAMPLE_ROWS:
+        assert generator.generate_card(row) == _old_generate_card(generator.template, row), row['card_name']
+
+
+def test_generate_card_leaves_template_untouched():
+    """Each card must be an independent copy of the template"""
+    generator = CardGenerator(str(TEMPLATE_PATH))
+    original = copy.deepcopy(generator.template)
+
+    first = generator.generate_card(SAMPLE_ROWS[0])
+    second = generator.generate_card(SAMPLE_ROWS[1])
+
+    assert generator.template == original
+    assert first != second
+
+
+def test_index_fields_first_match():
+    """_index_fields must point at the node the recursive search finds first"""
+    generator = CardGenerator(str(TEMPLATE_PATH))
+    index = generator._field_index
+    fields = [('text', 'Title'), ('text', 'Type'), ('text', 'Rules'), ('text', 'Cost'),
+              ('text', 'Left Stat'), ('text', 'Right Stat'), ('text', 'Collector Info'),
+              ('image', 'Art')]
+
+    for node_type, name in fields:
+        marker = f"__marker_{name}__"
+        data = copy.deepcopy(generator.template['data'])
+        if node_type == 'text':
+            found = _old_update_text_field(data, name, marker)
+        else:
+            found = _old_update_image_field(data, name, marker)
+        assert found == ((node_type, name) in index), name
+        if found:
+            node = CardGenerator._node_at(data, index[(node_type, name)])
+            assert node.get('text' if node_type == 'text' else 'src') == marker, name
+
+
+def test_update_methods_handle_deep_trees():
+    """The iterative update_* methods must not hit the recursion limit"""
+    generator = CardGenerator(str(TEMPLATE_PATH))
+    leaf = {'type': 'text', 'name': 'Title', 'text': ''}
+    root = leaf
+    for _ in range(sys.getrecursionlimit() * 2):
+        root = {'type': 'group', 'children': [root]}
+
+    assert generator.update_text_field(root, 'Title', 'Deep')
+    assert leaf['text'] == 'Deep'
+
+
+def test_generate_from_excel_writes_every_card(tmp_path):
+    """写盘在线程池中并行，同名卡牌仍按表格顺序后写覆盖先写"""
+    csv_path = tmp_path / 'cards.csv'
+    lines = ['card_name,card_type,cost']
+    lines += [f'Card {i},Action,{i}' for i in range(50)]
+    lines += ['Dup,First,1', 'Dup,Second,2']
+    csv_path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+
+    out_dir = tmp_path / 'out'
+    generator = CardGenerator(str(TEMPLATE_PATH))
+    generator.generate_from_excel(str(csv_path), str(out_dir))
+
+    written = sorted(p.name for p in out_dir.glob('*.json'))
+    assert written == sorted([f'Card_{i}.json' for i in range(50)] + ['Dup.json'])
+
+    for i in (0, 49):
+        card = json.loads((out_dir / f'Card_{i}.json').read_text(encoding='utf-8'))
+        assert card == generator.generate_card({'card_name': f'Card {i}', 'card_type': 'Action', 'cost': i})
+
+    dup = json.loads((out_dir / 'Dup.json').read_text(encoding='utf-8'))
+    assert dup == generator.generate_card({'card_name': 'Dup', 'card_type': 'Second', 'cost': 2})
+
+
+if __name__ == '__main__':
+    import pytest
+    sys.exit(pytest.main([__file__, '-q']))
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CardConjurerAutomation Test Script
+Checks the art overlay helpers that run without a browser
+"""
+
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).parent))
+import cardconjurer_automation
+from cardconjurer_automation import CardConjurerAutomation
+
+
+def test_is_opaque():
+    assert cardconjurer_automation._is_opaque(Image.new('RGB', (8, 8), (10, 20, 30)))
+    assert cardconjurer_automation._is_opaque(Image.new('RGBA', (8, 8), (10, 20, 30, 255)))
+
+    holed = Image.new('RGBA', (8, 8), (10, 20, 30, 255))
+    holed.putpixel((3, 4), (0, 0, 0, 254))
+    assert not cardconjurer_automation._is_opaque(holed)
+
+    palette = Image.new('P', (8, 8), 0)
+    palette.info['transparency'] = 0
+    assert not cardconjurer_automation._is_opaque(palette)
+
+
+def test_overlay_skips_opaque_card(tmp_path):
+    """卡牌完全不透明时不读取艺术图，直接输出原卡牌"""
+    base_path = tmp_path / 'card.png'
+    Image.new('RGBA', (40, 60), (200, 0, 0, 255)).save(base_path)
+    out_path = tmp_path / 'out.png'
+
+    automation = CardConjurerAutomation(download_dir=str(tmp_path))
+    assert automation.overlay_art_on_card(str(base_path), str(tmp_path / 'missing-art.png'), str(out_path))
+
+    with Image.open(out_path) as out, Image.open(base_path) as base:
+        assert out.tobytes() == base.tobytes()
+
+
+def _write_card(path, bounds):
+    card = {'data': {'children': [{'type': 'image', 'name': 'Art', 'src': '', 'bounds': bounds}]}}
+    path.write_text(json.dumps(card), encoding='utf-8')
+
+
+def test_json_bounds_cache(tmp_path, monkeypatch):
+    json_dir = tmp_path / 'json'
+    json_dir.mkdir()
+    _write_card(json_dir / 'a.json', {'x': 1})
+    _write_card(json_dir / 'b.json', {'x': 2})
+    (json_dir / 'plain.json').write_text('{"data": {}}', encoding='utf-8')
+
+    automation = CardConjurerAutomation(download_dir=str(tmp_path))
+    parsed = []
+    read_art_bounds = CardConjurerAutomation._read_art_bounds
+    monkeypatch.setattr(
+        CardConjurerAutomation, '_read_art_bounds',
+        staticmethod(lambda path: parsed.append(os.path.basename(path)) or read_art_bounds(path)),
+    )
+
+    assert automation._json_bounds(json_dir) == {'a': {'x': 1}, 'b': {'x': 2}}
+    assert sorted(parsed) == ['a.json', 'b.json', 'plain.json']
+
+    # 未变化的目录不再解析任何文件
+    parsed.clear()
+    assert automation._json_bounds(json_dir) == {'a': {'x': 1}, 'b': {'x': 2}}
+    assert parsed == []
+
+    # 修改后保持原修改时间的文件按大小变化识别；删除的文件从结果中去掉
+    st = os.stat(json_dir / 'a.json')
+    _write_card(json_dir / 'a.json', {'x': 100})
+    os.utime(json_dir / 'a.json', ns=(st.st_atime_ns, st.st_mtime_ns))
+    (json_dir / 'b.json').unlink()
+
+    assert automation._json_bounds(json_dir) == {'a': {'x': 100}}
+    assert parsed == ['a.json']
+
+
+def test_json_bounds_cache_is_per_instance(tmp_path):
+    """缓存只在内存中，不写入用户目录"""
+    json_dir = tmp_path / 'json'
+    json_dir.mkdir()
+    _write_card(json_dir / 'a.json', {'x': 1})
+
+    CardConjurerAutomation(download_dir=str(tmp_path))._json_bounds(json_dir)
+    assert CardConjurerAutomation(download_dir=str(tmp_path))._bounds_cache == {}
+
+
+def _gradient(size, alpha):
+    img = Image.new('RGBA', size)
+    img.putdata([((x * 7) % 256, (y * 5) % 256, (x + y) % 256, alpha(x, y))
+                 for y in range(size[1]) for x in range(size[0])])
+    return img
+
+
+def _composite_reference(base, art, pos):
+    """原始实现：整张透明画布上放置艺术图，再把卡牌整体合成在上面"""
+    canvas = Image.new('RGBA', base.size, (0, 0, 0, 0))
+    canvas.paste(art, pos)
+    return Image.alpha_composite(canvas, base)
+
+
+def _visible(img):
+    """完全透明像素的颜色不可见，比较时统一视为 (0, 0, 0, 0)"""
+    raw = img.tobytes()
+    return [raw[i:i + 4] if raw[i + 3] else b'\0\0\0\0' for i in range(0, len(raw), 4)]
+
+
+@pytest.mark.parametrize('pos', [(5, 8), (0, 0), (-6, -4), (20, 30), (-3, 25), (40, 10), (-50, -50)])
+def test_composite_under_matches_full_canvas(pos):
+    # 卡牌中间是半透明/透明的艺术窗口，四周不透明
+    base = _gradient((32, 48), lambda x, y: 0 if 8 <= x < 24 and 10 <= y < 30 else (128 if x == 8 else 255))
+    art = _gradient((20, 22), lambda x, y: 255 if (x + y) % 3 else 90)
+
+    result = cardconjurer_automation._composite_under(base, art, pos)
+    assert _visible(result) == _visible(_composite_reference(base, art, pos))
+    assert result.size == base.size
+
+
+if __name__ == '__main__':
+    sys.exit(pytest.main([__file__, '-q']))
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+GUI Test Script
+Checks the queued log writer without opening a window
+"""
+
+import queue
+import sys
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from gui import CardGeneratorGUI
+
+
+class _FakeRoot:
+    def __init__(self):
+        self.scheduled = []
+
+    def after(self, ms, callback):
+        self.scheduled.append((ms, callback))
+
+
+class _FakeText:
+    """只实现 _drain_logs 用到的 Text 控件接口"""
+
+    def __init__(self):
+        self.text = ''
+        self.inserts = 0
+
+    def insert(self, index, text):
+        self.text += text
+        self.inserts += 1
+
+    def index(self, index):
+        # 'end-1c' 所在行号，与 Tk 一致从 1 开始
+        return f"{self.text.count(chr(10)) + 1}.0"
+
+    def delete(self, start, end):
+        lines = self.text.split('\n')
+        self.text = '\n'.join(lines[int(end.split('.')[0]) - 1:])
+
+    def see(self, index):
+        pass
+
+
+class _FakeVar:
+    def __init__(self):
+        self.values = []
+
+    def set(self, value):
+        self.values.append(value)
+
+
+def _make_gui():
+    gui = CardGeneratorGUI.__new__(CardGeneratorGUI)
+    gui.root = _FakeRoot()
+    gui._log_queue = queue.Queue()
+    gui._progress_vars = {'progress_import': _FakeVar()}
+    return gui
+
+
+def test_drain_logs_batches_per_widget():
+    gui = _make_gui()
+    first, second = _FakeText(), _FakeText()
+
+    threads = [threading.Thread(target=gui.log_message, args=(first, f"line {i}\n")) for i in range(20)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    gui.log_message(second, "other\n")
+
+    gui._drain_logs()
+
+    assert first.inserts == 1
+    assert sorted(first.text.splitlines()) == sorted(f"line {i}" for i in range(20))
+    assert second.text == "other\n"
+    # 每次处理后重新排期
+    assert gui.root.scheduled == [(50, gui._drain_logs)]
+
+
+def test_drain_logs_keeps_latest_progress():
+    gui = _make_gui()
+    for done in (1, 5, 9):
+        gui._log_queue.put(('progress_import', done))
+
+    gui._drain_logs()
+
+    assert gui._progress_vars['progress_import'].values == [9]
+
+
+def test_drain_logs_caps_lines():
+    gui = _make_gui()
+    widget = _FakeText()
+    for i in range(CardGeneratorGUI.LOG_MAX_LINES + 100):
+        gui.log_message(widget, f"line {i}\n")
+
+    gui._drain_logs()
+
+    lines = widget.text.splitlines()
+    assert len(lines) == CardGeneratorGUI.LOG_MAX_LINES - 1
+    assert lines[-1] == f"line {CardGeneratorGUI.LOG_MAX_LINES + 99}"
+
+
+def test_drain_logs_empty_queue():
+    gui = _make_gui()
+    gui._drain_logs()
+    assert len(gui.root.scheduled) == 1
+
+
+if __name__ == '__main__':
+    import pytest
+    sys.exit(pytest.main([__file__, '-q']))
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+json_utils Test Script
+Checks the shared file-name sanitizer and JSON writer
+"""
+
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+import json_utils
+from json_utils import sanitize_filename, write_json
+
+CARD = {'name': '影子打击', 'data': {'children': [{'type': 'text', 'name': 'Title', 'text': 'Ninja'}]}, 'width': 750}
+
+NAMES = [
+    'Shadow Strike',
+    '  Iron / Wall?  ',
+    'Fire-Ball_2',
+    '影子 打击',
+    'Ünïcödé: Ñame!',
+    'tab\there',
+    '',
+]
+
+
+def _old_sanitize(card_name):
+    """原始实现：逐字符判断"""
+    safe_name = "".join(c for c in card_name if c.isalnum() or c in (' ', '-', '_')).strip()
+    return safe_name.replace(' ', '_')
+
+
+def test_sanitize_matches_original_rule():
+    for name in NAMES:
+        assert sanitize_filename(name) == _old_sanitize(name), name
+
+
+def test_sanitize_matches_original_rule_for_every_bmp_character():
+    chars = ''.join(chr(i) for i in range(0x10000) if not 0xD800 <= i <= 0xDFFF)
+    assert sanitize_filename(chars) == _old_sanitize(chars)
+
+
+def test_sanitize_examples():
+    assert sanitize_filename('Shadow Strike') == 'Shadow_Strike'
+    assert sanitize_filename('  Iron / Wall?  ') == 'Iron__Wall'
+    assert sanitize_filename('影子 打击') == '影子_打击'
+
+
+def test_modules_share_one_sanitizer():
+    """JSON 与卡图使用同一个函数，同一卡牌名得到相同文件名"""
+    import card_generator
+    import simple_generator
+    import ai_image_generator
+    import mcp_server
+
+    for module in (card_generator, simple_generator, ai_image_generator, mcp_server):
+        assert module.sanitize_filename is sanitize_filename, module.__name__
+
+
+def test_write_json_round_trip(tmp_path):
+    path = tmp_path / 'card.json'
+    write_json(path, CARD)
+    assert json.loads(path.read_text(encoding='utf-8')) == CARD
+
+
+def test_write_json_format(tmp_path, monkeypatch):
+    """有无 orjson 写出的文件逐字节相同：UTF-8 原文、2 空格缩进"""
+    expected = json.dumps(CARD, indent=2, ensure_ascii=False)
+
+    fast = tmp_path / 'fast.json'
+    write_json(fast, CARD)
+
+    fallback = tmp_path / 'fallback.json'
+    monkeypatch.setattr(json_utils, 'orjson', None)
+    write_json(fallback, CARD)
+
+    assert fallback.read_text(encoding='utf-8') == expected
+    assert fast.read_bytes() == fallback.read_bytes()
+
+
+if __name__ == '__main__':
+    import pytest
+    sys.exit(pytest.main([__file__, '-q']))